@@ -1,13 +1,42 @@
+import sys
+import time
+
+STARTED = time.perf_counter()
+
+if __name__ == "__main__" and len(sys.argv) > 1:
+    from cli import cli_main
+    sys.exit(cli_main())
+
+import os
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox
-import yfinance as yf
-import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-from sklearn.linear_model import LinearRegression
+from concurrent.futures import ThreadPoolExecutor
+from instrumentation import (DrawTimer, StageTimer, configure_timing_log, 
+                             profiled)
+from model_names import DEFAULT_MODEL, MODEL_CHOICES
+from theme import (COLORS, DOWN_COLOR, PRED_DOWN_COLOR, PRED_UP_COLOR, 
+                   UP_COLOR)
+from widgets import Autocomplete, VirtualTable
+
+LIVE_POLL_MS = 15000
+REPLAY_POLL_MS = 1000
+REPLAY_ENV = 'STOCK_ANALYSIS_REPLAY'
+REPLAY_SPEED_ENV = 'STOCK_ANALYSIS_REPLAY_SPEED'
+
+WATCH_COLUMNS = [('Symbol', 80), ('Company', 180), ('Current Price', 110), 
+                 ('Change', 150), ('Volume', 100), ('Predicted Price', 120), 
+                 ('Predicted Change', 150)]
+
+PRICE_OVERLAY_NAMES = ['SMA', 'EMA', 'Bollinger', 'VWAP']
+PANEL_OVERLAY_NAMES = ['None', 'RSI', 'MACD']
+PORTFOLIO_MATRICES = ['Correlation', 'Covariance']
+
+CHART_MODULES = ['matplotlib.style', 'matplotlib.figure', 
+                 'matplotlib.backends.backend_tkagg', 'charts']
+
+class AnalysisCancelled(Exception):
+    pass
 
 class StockPredictionApp:
     def __init__(self, root):
@@ -15,32 +44,81 @@ class StockPredictionApp:
         self.root.title("Stock Prediction Analysis - Pro Edition")
         self.root.geometry("1400x900")
         
-        self.colors = {
-            'bg_gradient_top': '#667eea',
-            'bg_gradient_bottom': '#764ba2',
-            'bg_main': '#1a1a2e',
-            'bg_secondary': '#16213e',
-            'accent_primary': '#f64c72',
-            'accent_secondary': '#4facfe',
-            'success': '#00f2fe',
-            'warning': '#ffd93d',
-            'text_primary': '#ffffff',
-            'text_secondary': '#a8b2d1',
-            'card_bg': '#0f3460',
-            'button_gradient_1': '#f093fb',
-            'button_gradient_2': '#f5576c',
-        }
+        self.colors = dict(COLORS)
         
         self.root.configure(bg=self.colors['bg_main'])
         self.stock_data = None
         self.predictions = None
+        self.current_symbol = None
+        self.symbol_index = None
+        self.request_id = 0
+        self.pending_timer = None
+        self.live_session = None
+        self.live_id = 0
+        self.executor = ThreadPoolExecutor(max_workers=2,
+                                           thread_name_prefix='analysis')
+        self.engine = None
+        self.engine_lock = threading.Lock()
+        self.chart = None
+        self.pending_plot = None
+        self.startup_timer = StageTimer('startup')
+        self.scheduler = None
+        self.watch_params = ('1y', 30, DEFAULT_MODEL)
+        self.portfolio_id = 0
+        self.portfolio_result = None
+        self.matrix_chart = None
         
         self.create_custom_styles()
         self.create_gradient_background()
         self.create_header()
         self.create_input_section()
         self.create_info_cards()
+        self.create_watchlist_section()
+        self.create_portfolio_section()
         self.create_chart_section()
+        
+        self.root.after_idle(self.finish_startup)
+    
+    def finish_startup(self):
+        self.startup_timer.context['first_paint_ms'] = round(
+            (time.perf_counter() - STARTED) * 1000, 3)
+        self.executor.submit(self.prewarm)
+    
+    def prewarm(self):
+        with self.startup_timer.stage('import_engine'):
+            self.get_engine()
+        self.root.after(0, self.start_watchlist)
+        with self.startup_timer.stage('import_chart'):
+            for module in CHART_MODULES:
+                __import__(module)
+        self.root.after(0, self.create_chart)
+        self.load_symbol_index()
+    
+    def load_symbol_index(self):
+        from symbols import load_index
+        index = load_index()
+        self.root.after(0, self.set_symbol_index, index)
+    
+    def set_symbol_index(self, index):
+        self.symbol_index = index
+    
+    def search_symbols(self, text):
+        if self.symbol_index is None:
+            return []
+        return self.symbol_index.search(text)
+    
+    def check_symbol(self, symbol):
+        # Until the directory has loaded every symbol is allowed through.
+        if self.symbol_index is None:
+            return None
+        return self.symbol_index.check(symbol)
+    
+    def get_engine(self):
+        with self.engine_lock:
+            if self.engine is None:
+                from engine import AnalysisEngine
+                self.engine = AnalysisEngine()
+            return self.engine
     
     def create_custom_styles(self):
         style = ttk.Style()
@@ -51,6 +129,16 @@ class StockPredictionApp:
                        background=self.colors['accent_secondary'],
                        foreground=self.colors['text_primary'],
                        arrowcolor=self.colors['text_primary'])
+        
+        style.configure('Watch.Treeview',
+                       background=self.colors['bg_secondary'],
+                       fieldbackground=self.colors['bg_secondary'],
+                       foreground=self.colors['text_primary'],
+                       rowheight=24)
+        style.configure('Watch.Treeview.Heading',
+                       background=self.colors['card_bg'],
+                       foreground=self.colors['success'],
+                       font=('Helvetica', 10, 'bold'))
     
     def create_gradient_background(self):
         self.main_canvas = tk.Canvas(self.root, bg=self.colors['bg_main'], 
@@ -128,6 +216,8 @@ class StockPredictionApp:
         self.create_dropdown_field(grid_frame, "Time Period", 1, 
                                    ['1mo', '3mo', '6mo', '1y', '2y', '5y'], '1y')
         self.create_input_field(grid_frame, "Predict Days", 2, "30", 'pred_days')
+        self.create_dropdown_field(grid_frame, "Model", 2, MODEL_CHOICES, DEFAULT_MODEL, 
+                                   'model', column=2)
         
         self.create_gradient_button(card_frame)
     
@@ -157,26 +247,41 @@ class StockPredictionApp:
         
         if field_name == 'symbol':
             self.symbol_entry = entry
+            self.symbol_complete = Autocomplete(entry, self.search_symbols, 
+                                                font=('Helvetica', 10), 
+                                                width=48, 
+                                                bg=self.colors['bg_secondary'], 
+                                                fg=self.colors['text_primary'], 
+                                                selectbackground=self.colors['accent_secondary'], 
+                                                selectforeground=self.colors['text_primary'], 
+                                                relief=tk.FLAT, bd=1)
         elif field_name == 'pred_days':
             self.pred_days_entry = entry
     
-    def create_dropdown_field(self, parent, label_text, row, values, default):
+    def create_dropdown_field(self, parent, label_text, row, values, default, 
+                              field_name='period', column=0):
         label = tk.Label(parent,
                         text=label_text,
                         font=('Helvetica', 12, 'bold'),
                         bg=self.colors['card_bg'],
                         fg=self.colors['text_primary'])
-        label.grid(row=row, column=0, sticky='w', padx=20, pady=15)
+        label.grid(row=row, column=column, sticky='w', padx=20, pady=15)
         
-        self.period_var = tk.StringVar(value=default)
+        var = tk.StringVar(value=default)
+        if field_name == 'period':
+            self.period_var = var
+        elif field_name == 'model':
+            self.model_var = var
         dropdown = ttk.Combobox(parent,
-                               textvariable=self.period_var,
+                               textvariable=var,
                                values=values,
                                state='readonly',
                                font=('Helvetica', 11),
                                width=18,
                                style='Custom.TCombobox')
-        dropdown.grid(row=row, column=1, padx=20, pady=15, sticky='ew')
+        dropdown.grid(row=row, column=column + 1, padx=20, pady=15, sticky='ew')
+        if field_name == 'model':
+            dropdown.bind('<<ComboboxSelected>>', lambda e: self.on_model_change())
     
     def create_gradient_button(self, parent):
         button_frame = tk.Frame(parent, bg=self.colors['card_bg'])
@@ -202,6 +307,46 @@ class StockPredictionApp:
         self.analyze_button.bind('<Leave>', 
                                 lambda e: self.analyze_button.config(
                                     bg=self.colors['accent_primary']))
+        
+        self.cancel_button = tk.Button(button_frame,
+                                       text="CANCEL",
+                                       font=('Helvetica', 11, 'bold'),
+                                       bg=self.colors['bg_secondary'],
+                                       fg=self.colors['text_primary'],
+                                       activebackground=self.colors['card_bg'],
+                                       activeforeground=self.colors['text_primary'],
+                                       relief=tk.FLAT,
+                                       padx=20,
+                                       pady=8,
+                                       cursor='hand2',
+                                       state=tk.DISABLED,
+                                       command=self.cancel_analysis)
+        self.cancel_button.pack(pady=(10, 0))
+        
+        self.live_button = tk.Button(button_frame,
+                                     text="GO LIVE",
+                                     font=('Helvetica', 11, 'bold'),
+                                     bg=self.colors['accent_secondary'],
+                                     fg=self.colors['text_primary'],
+                                     activebackground=self.colors['card_bg'],
+                                     activeforeground=self.colors['text_primary'],
+                                     relief=tk.FLAT,
+                                     padx=20,
+                                     pady=8,
+                                     cursor='hand2',
+                                     command=self.toggle_live)
+        self.live_button.pack(pady=(10, 0))
+        
+        self.progress = ttk.Progressbar(button_frame, mode='indeterminate', 
+                                        length=260)
+        self.progress.pack(pady=(10, 0))
+        
+        self.status_label = tk.Label(button_frame,
+                                     text="",
+                                     font=('Helvetica', 10),
+                                     bg=self.colors['card_bg'],
+                                     fg=self.colors['text_secondary'])
+        self.status_label.pack(pady=(5, 0))
     
     def create_info_cards(self):
         cards_container = tk.Frame(self.content_frame, bg=self.colors['bg_main'])
@@ -251,6 +396,210 @@ class StockPredictionApp:
     def _lighten_color(self, hex_color):
         return hex_color
     
+    def create_watchlist_section(self):
+        watch_container = tk.Frame(self.content_frame, bg=self.colors['bg_main'])
+        watch_container.pack(fill=tk.X, padx=40, pady=20)
+        
+        watch_card = tk.Frame(watch_container, bg=self.colors['card_bg'], 
+                             relief=tk.RAISED, bd=0)
+        watch_card.pack(fill=tk.X, padx=10, pady=10)
+        
+        watch_title = tk.Label(watch_card,
+                              text="Watchlist",
+                              font=('Helvetica', 16, 'bold'),
+                              bg=self.colors['card_bg'],
+                              fg=self.colors['success'])
+        watch_title.pack(pady=(15, 10))
+        
+        controls = tk.Frame(watch_card, bg=self.colors['card_bg'])
+        controls.pack(pady=(0, 10))
+        
+        self.watch_entry = tk.Entry(controls,
+                                    font=('Helvetica', 11),
+                                    bg=self.colors['bg_secondary'],
+                                    fg=self.colors['text_primary'],
+                                    insertbackground=self.colors['success'],
+                                    relief=tk.FLAT,
+                                    width=20,
+                                    bd=2)
+        self.watch_entry.pack(side=tk.LEFT, padx=10)
+        self.watch_entry.bind('<Return>', lambda e: self.add_watch_symbols())
+        
+        for text, command in (("ADD", self.add_watch_symbols), 
+                              ("REMOVE", self.remove_watch_symbol)):
+            tk.Button(controls,
+                      text=text,
+                      font=('Helvetica', 10, 'bold'),
+                      bg=self.colors['accent_secondary'],
+                      fg=self.colors['text_primary'],
+                      activebackground=self.colors['card_bg'],
+                      activeforeground=self.colors['text_primary'],
+                      relief=tk.FLAT,
+                      padx=15,
+                      cursor='hand2',
+                      command=command).pack(side=tk.LEFT, padx=5)
+        
+        self.watch_table = VirtualTable(watch_card, WATCH_COLUMNS, height=10, 
+                                        style='Watch.Treeview', 
+                                        format_row=self.format_watch_row, 
+                                        on_scroll=self._on_watch_scroll, 
+                                        on_activate=self.open_watch_symbol)
+        self.watch_table.tree.tag_configure('up', foreground=UP_COLOR)
+        self.watch_table.tree.tag_configure('down', foreground=DOWN_COLOR)
+        self.watch_table.pack(fill=tk.X, padx=30, pady=(0, 20))
+        self.watchlist = []
+    
+    def start_watchlist(self):
+        from watchlist import RefreshScheduler, load_watchlist
+        self.watchlist = load_watchlist()
+        self.watch_table.set_keys(self.watchlist)
+        self.scheduler = RefreshScheduler(self.refresh_watch_symbol, 
+                                          self._on_watch_result)
+        self.scheduler.set_symbols(self.watchlist)
+        self.scheduler.set_visible(self.watch_table.visible_keys())
+        self.scheduler.start()
+    
+    def refresh_watch_symbol(self, symbol):
+        period, pred_days, model = self.watch_params
+        return self.get_engine().analyze(symbol, period, pred_days, model, 
+                                         on_name_update=self._on_watch_name)
+    
+    def _on_watch_result(self, symbol, record):
+        self.root.after(0, self.watch_table.update_record, symbol, record)
+    
+    def _on_watch_name(self, symbol, company_name):
+        self.root.after(0, self._set_watch_name, symbol, company_name)
+    
+    def _set_watch_name(self, symbol, company_name):
+        record = self.watch_table.records.get(symbol)
+        if record and not record.get('error'):
+            self.watch_table.update_record(symbol, dict(record, company_name=company_name))
+    
+    def _on_watch_scroll(self, symbols):
+        if self.scheduler is not None:
+            self.scheduler.set_visible(symbols)
+    
+    def format_watch_row(self, symbol, record):
+        if record is None:
+            return [symbol, "--", "$--", "--", "--", "$--", "--"], ()
+        if record.get('error'):
+            return [symbol, record['error'][:40], "", "", "", "", ""], ()
+        
+        volume = record['volume']
+        volume_text = f"{volume:,.0f}"
+        if volume >= 1_000_000:
+            volume_text = f"{volume/1_000_000:.2f}M"
+        values = [symbol, 
+                  record['company_name'][:20], 
+                  f"${record['current_price']:.2f}", 
+                  f"{record['change']:+.2f} ({record['change_percent']:+.2f}%)", 
+                  volume_text, 
+                  f"${record['pred_price']:.2f}", 
+                  f"{record['pred_change']:+.2f} ({record['pred_change_percent']:+.2f}%)"]
+        return values, ('up' if record['change'] >= 0 else 'down',)
+    
+    def add_watch_symbols(self):
+        symbols = self.watch_entry.get().replace(',', ' ').upper().split()
+        checks = {symbol: self.check_symbol(symbol) for symbol in symbols}
+        errors = [error for error in checks.values() if error]
+        added = [symbol for symbol, error in checks.items() 
+                 if not error and symbol not in self.watchlist]
+        self.watch_entry.delete(0, tk.END)
+        if added:
+            self.set_watchlist(self.watchlist + added)
+        if errors:
+            self.show_colorful_message("Error", "\n".join(errors), "error")
+    
+    def remove_watch_symbol(self):
+        symbol = self.watch_table.selected_key()
+        if symbol is not None:
+            self.set_watchlist([s for s in self.watchlist if s != symbol])
+    
+    def set_watchlist(self, symbols):
+        from watchlist import save_watchlist
+        self.watchlist = symbols
+        self.watch_table.set_keys(symbols)
+        if self.scheduler is not None:
+            self.scheduler.set_symbols(symbols)
+        try:
+            save_watchlist(symbols)
+        except OSError as e:
+            self.set_status(f"Could not save watchlist: {e}")
+    
+    def open_watch_symbol(self, symbol):
+        self.symbol_entry.delete(0, tk.END)
+        self.symbol_entry.insert(0, symbol)
+        self.analyze_stock()
+    
+    def create_portfolio_section(self):
+        portfolio_container = tk.Frame(self.content_frame, bg=self.colors['bg_main'])
+        portfolio_container.pack(fill=tk.X, padx=40, pady=20)
+        
+        portfolio_card = tk.Frame(portfolio_container, bg=self.colors['card_bg'], 
+                                  relief=tk.RAISED, bd=0)
+        portfolio_card.pack(fill=tk.X, padx=10, pady=10)
+        
+        portfolio_title = tk.Label(portfolio_card,
+                                   text="Portfolio",
+                                   font=('Helvetica', 16, 'bold'),
+                                   bg=self.colors['card_bg'],
+                                   fg=self.colors['success'])
+        portfolio_title.pack(pady=(15, 10))
+        
+        controls = tk.Frame(portfolio_card, bg=self.colors['card_bg'])
+        controls.pack(pady=(0, 20))
+        
+        entries = {}
+        for name, text, width, default in (('symbols', "Symbols", 36, ""), 
+                                           ('benchmark', "Benchmark", 8, "SPY")):
+            tk.Label(controls,
+                     text=text,
+                     font=('Helvetica', 10, 'bold'),
+                     bg=self.colors['card_bg'],
+                     fg=self.colors['text_primary']).pack(side=tk.LEFT, padx=(10, 5))
+            entry = tk.Entry(controls,
+                             font=('Helvetica', 11),
+                             bg=self.colors['bg_secondary'],
+                             fg=self.colors['text_primary'],
+                             insertbackground=self.colors['success'],
+                             relief=tk.FLAT,
+                             width=width,
+                             bd=2)
+            entry.insert(0, default)
+            entry.pack(side=tk.LEFT, padx=(0, 10))
+            entries[name] = entry
+        self.portfolio_entry = entries['symbols']
+        self.benchmark_entry = entries['benchmark']
+        self.portfolio_entry.bind('<Return>', lambda e: self.analyze_portfolio())
+        
+        tk.Label(controls,
+                 text="Matrix",
+                 font=('Helvetica', 10, 'bold'),
+                 bg=self.colors['card_bg'],
+                 fg=self.colors['text_primary']).pack(side=tk.LEFT, padx=(10, 5))
+        self.matrix_var = tk.StringVar(value=PORTFOLIO_MATRICES[0])
+        matrix_dropdown = ttk.Combobox(controls,
+                                       textvariable=self.matrix_var,
+                                       values=PORTFOLIO_MATRICES,
+                                       state='readonly',
+                                       font=('Helvetica', 10),
+                                       width=12,
+                                       style='Custom.TCombobox')
+        matrix_dropdown.pack(side=tk.LEFT, padx=(0, 10))
+        matrix_dropdown.bind('<<ComboboxSelected>>', lambda e: self.plot_portfolio())
+        
+        tk.Button(controls,
+                  text="ANALYZE PORTFOLIO",
+                  font=('Helvetica', 10, 'bold'),
+                  bg=self.colors['accent_secondary'],
+                  fg=self.colors['text_primary'],
+                  activebackground=self.colors['card_bg'],
+                  activeforeground=self.colors['text_primary'],
+                  relief=tk.FLAT,
+                  padx=15,
+                  cursor='hand2',
+                  command=self.analyze_portfolio).pack(side=tk.LEFT, padx=5)
+    
     def create_chart_section(self):
         chart_container = tk.Frame(self.content_frame, bg=self.colors['bg_main'])
         chart_container.pack(fill=tk.BOTH, expand=True, padx=40, pady=20)
@@ -266,179 +615,470 @@ class StockPredictionApp:
                               fg=self.colors['success'])
         chart_title.pack(pady=(15, 10))
         
-        plt.style.use('dark_background')
-        self.figure = Figure(figsize=(14, 7), dpi=100, 
-                            facecolor=self.colors['card_bg'])
+        overlay_frame = tk.Frame(chart_card, bg=self.colors['card_bg'])
+        overlay_frame.pack(pady=(0, 5))
         
-        self.canvas = FigureCanvasTkAgg(self.figure, chart_card)
-        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, 
-                                         padx=15, pady=15)
+        self.overlay_vars = {}
+        for name in PRICE_OVERLAY_NAMES:
+            var = tk.BooleanVar(value=False)
+            check = tk.Checkbutton(overlay_frame,
+                                   text=name,
+                                   variable=var,
+                                   command=self.update_overlays,
+                                   font=('Helvetica', 10, 'bold'),
+                                   bg=self.colors['card_bg'],
+                                   fg=self.colors['text_primary'],
+                                   selectcolor=self.colors['bg_secondary'],
+                                   activebackground=self.colors['card_bg'],
+                                   activeforeground=self.colors['text_primary'])
+            check.pack(side=tk.LEFT, padx=8)
+            self.overlay_vars[name] = var
+        
+        panel_label = tk.Label(overlay_frame,
+                               text="Volume panel",
+                               font=('Helvetica', 10, 'bold'),
+                               bg=self.colors['card_bg'],
+                               fg=self.colors['text_primary'])
+        panel_label.pack(side=tk.LEFT, padx=(20, 5))
+        
+        self.panel_var = tk.StringVar(value='None')
+        panel_dropdown = ttk.Combobox(overlay_frame,
+                                      textvariable=self.panel_var,
+                                      values=PANEL_OVERLAY_NAMES,
+                                      state='readonly',
+                                      font=('Helvetica', 10),
+                                      width=8,
+                                      style='Custom.TCombobox')
+        panel_dropdown.pack(side=tk.LEFT)
+        panel_dropdown.bind('<<ComboboxSelected>>', lambda e: self.update_overlays())
+        
+        self.chart_card = chart_card
+        self.chart_placeholder = tk.Label(chart_card,
+                                          text="Loading chart...",
+                                          font=('Helvetica', 12),
+                                          bg=self.colors['card_bg'],
+                                          fg=self.colors['text_secondary'],
+                                          height=20)
+        self.chart_placeholder.pack(fill=tk.BOTH, expand=True, padx=15, pady=15)
     
-    def fetch_stock_data(self, symbol, period):
-        try:
-            stock = yf.Ticker(symbol)
-            df = stock.history(period=period)
+    def create_chart(self):
+        with self.startup_timer.stage('build_chart'):
+            from matplotlib import style
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            from matplotlib.figure import Figure
+            from charts import PriceChart
             
-            if df.empty:
-                raise ValueError("No data found for this symbol")
+            style.use('dark_background')
+            self.figure = Figure(figsize=(14, 7), dpi=100, 
+                                facecolor=self.colors['card_bg'])
             
-            info = stock.info
-            company_name = info.get('longName', symbol)
+            self.chart_placeholder.destroy()
+            self.canvas = FigureCanvasTkAgg(self.figure, self.chart_card)
+            self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, 
+                                             padx=15, pady=15)
             
-            return df, company_name
-        except Exception as e:
-            raise Exception(f"Error fetching data: {str(e)}")
-    
-    def predict_prices(self, df, days):
-        df = df.dropna()
-        df['Days'] = np.arange(len(df))
-        
-        X = df[['Days']].values
-        y = df['Close'].values
-        
-        model = LinearRegression()
-        model.fit(X, y)
+            self.chart = PriceChart(self.figure, self.colors)
+            DrawTimer(self.canvas, self._on_canvas_draw)
+            self.update_overlays()
         
-        last_day = X[-1][0]
-        future_days = np.array([[last_day + i] for i in range(1, days + 1)])
-        predictions = model.predict(future_days)
+        if self.pending_plot is not None:
+            self.plot_data(*self.pending_plot)
+            self.pending_plot = None
+        self.plot_portfolio()
         
-        last_date = df.index[-1]
-        pred_dates = pd.date_range(start=last_date + timedelta(days=1), 
-                                   periods=days, freq='D')
-        
-        r2 = model.score(X, y)
-        
-        return pred_dates, predictions, r2
+        context = self.startup_timer.context
+        context['ready_ms'] = round((time.perf_counter() - STARTED) * 1000, 3)
+        self.startup_timer.log()
+        if self.request_id == 0:
+            self.set_status(f"Window painted in {context['first_paint_ms']:.0f} ms, "
+                            f"ready in {context['ready_ms']:.0f} ms")
+    
+    def fetch_stock_data(self, symbol, period, timer=None):
+        return self.get_engine().fetch(symbol, period, 
+                                 on_name_update=self._on_company_name, 
+                                 timer=timer)
+    
+    def _on_company_name(self, symbol, company_name):
+        self.root.after(0, self._set_company_name, symbol, company_name)
+    
+    def _set_company_name(self, symbol, company_name):
+        if symbol == self.current_symbol:
+            self.set_card_text('Company', company_name[:20])
+    
+    def predict_prices(self, df, days, model=DEFAULT_MODEL):
+        from engine import predict_prices
+        return predict_prices(df, days, model)
     
     def update_info_display(self, company_name, current_price, change, 
                            volume, pred_price, pred_change):
-        self.info_cards['Company'][0].config(text=company_name[:20])
-        self.info_cards['Current Price'][0].config(text=f"${current_price:.2f}")
+        self.set_card_text('Company', company_name[:20])
+        self.set_card_text('Current Price', f"${current_price:.2f}")
         
         change_percent = (change/current_price)*100
         change_text = f"{change:+.2f}\n({change_percent:+.2f}%)"
-        self.info_cards['Change'][0].config(text=change_text)
+        self.set_card_text('Change', change_text)
         
         if change >= 0:
-            self.info_cards['Change'][1].config(bg='#00f2a0')
+            self.set_card_bg('Change', UP_COLOR)
         else:
-            self.info_cards['Change'][1].config(bg='#ff6b6b')
+            self.set_card_bg('Change', DOWN_COLOR)
         
         volume_text = f"{volume:,.0f}"
         if volume >= 1_000_000:
             volume_text = f"{volume/1_000_000:.2f}M"
-        self.info_cards['Volume'][0].config(text=volume_text)
+        self.set_card_text('Volume', volume_text)
         
-        self.info_cards['Predicted Price'][0].config(text=f"${pred_price:.2f}")
+        self.set_card_text('Predicted Price', f"${pred_price:.2f}")
         
         pred_change_percent = (pred_change/current_price)*100
         pred_text = f"{pred_change:+.2f}\n({pred_change_percent:+.2f}%)"
-        self.info_cards['Predicted Change'][0].config(text=pred_text)
+        self.set_card_text('Predicted Change', pred_text)
         
         if pred_change >= 0:
-            self.info_cards['Predicted Change'][1].config(bg='#4ecdc4')
+            self.set_card_bg('Predicted Change', PRED_UP_COLOR)
         else:
-            self.info_cards['Predicted Change'][1].config(bg='#ff6b9d')
-    
-    def plot_data(self, df, pred_dates, predictions):
-        self.figure.clear()
-        self.figure.patch.set_facecolor(self.colors['card_bg'])
-        
-        ax1 = self.figure.add_subplot(2, 1, 1, facecolor=self.colors['bg_secondary'])
-        ax2 = self.figure.add_subplot(2, 1, 2, facecolor=self.colors['bg_secondary'])
-        
-        ax1.plot(df.index, df['Close'], label='Actual Price', 
-                color='#00f2fe', linewidth=3, alpha=0.8)
-        ax1.fill_between(df.index, df['Close'], alpha=0.3, color='#00f2fe')
-        
-        ax1.plot(pred_dates, predictions, label='Predicted Price', 
-                color='#f093fb', linestyle='--', linewidth=3, 
-                marker='o', markersize=4, alpha=0.9)
-        ax1.fill_between(pred_dates, predictions, alpha=0.2, color='#f093fb')
-        
-        ax1.set_title('Stock Price Analysis & Forecast', 
-                     fontsize=16, fontweight='bold', 
-                     color=self.colors['success'], pad=20)
-        ax1.set_xlabel('Date', fontsize=11, color=self.colors['text_secondary'])
-        ax1.set_ylabel('Price ($)', fontsize=11, color=self.colors['text_secondary'])
-        ax1.legend(loc='upper left', framealpha=0.9, fontsize=10)
-        ax1.grid(True, alpha=0.2, linestyle='--', 
-                color=self.colors['text_secondary'])
-        ax1.tick_params(colors=self.colors['text_secondary'])
-        
-        for spine in ax1.spines.values():
-            spine.set_color(self.colors['text_secondary'])
-            spine.set_linewidth(0.5)
-        
-        colors_volume = ['#ffd93d' if v >= df['Volume'].mean() else '#6c5ce7' 
-                        for v in df['Volume']]
-        ax2.bar(df.index, df['Volume'], color=colors_volume, alpha=0.7, width=1)
-        
-        ax2.set_title('Trading Volume', fontsize=16, fontweight='bold', 
-                     color=self.colors['warning'], pad=20)
-        ax2.set_xlabel('Date', fontsize=11, color=self.colors['text_secondary'])
-        ax2.set_ylabel('Volume', fontsize=11, color=self.colors['text_secondary'])
-        ax2.grid(True, alpha=0.2, linestyle='--', 
-                color=self.colors['text_secondary'])
-        ax2.tick_params(colors=self.colors['text_secondary'])
-        
-        for spine in ax2.spines.values():
-            spine.set_color(self.colors['text_secondary'])
-            spine.set_linewidth(0.5)
-        
-        self.figure.tight_layout(pad=3)
-        self.canvas.draw()
+            self.set_card_bg('Predicted Change', PRED_DOWN_COLOR)
     
-    def analyze_stock(self):
+    def set_card_text(self, title, text):
+        label = self.info_cards[title][0]
+        if label.cget('text') != text:
+            label.config(text=text)
+    
+    def set_card_bg(self, title, color):
+        card = self.info_cards[title][1]
+        if card.cget('bg') != color:
+            card.config(bg=color)
+    
+    def plot_data(self, df, pred_dates, predictions, indicators=None):
+        if self.chart is None:
+            self.pending_plot = (df, pred_dates, predictions, indicators)
+            return
+        self.chart.update(df, pred_dates, predictions, indicators)
+    
+    def analyze_portfolio(self):
+        # Blank symbols means the whole watchlist.
+        symbols = self.portfolio_entry.get().replace(',', ' ').upper().split()
+        symbols = list(dict.fromkeys(symbols or self.watchlist))
+        benchmark = self.benchmark_entry.get().strip().upper() or 'SPY'
+        period = self.period_var.get()
+        if not symbols:
+            self.show_colorful_message("Error", 
+                                      "Enter portfolio symbols or add some to the watchlist", 
+                                      "error")
+            return
+        errors = [error for error in map(self.check_symbol, symbols + [benchmark]) if error]
+        if errors:
+            self.show_colorful_message("Error", "\n".join(errors), "error")
+            return
+        
+        self.portfolio_id += 1
+        portfolio_id = self.portfolio_id
+        self.set_status(f"Analyzing a portfolio of {len(symbols)} symbols...")
+        future = self.executor.submit(self.run_portfolio, symbols, period, benchmark)
+        future.add_done_callback(
+            lambda f: self.root.after(0, self.finish_portfolio, portfolio_id, f))
+    
+    def run_portfolio(self, symbols, period, benchmark):
+        timer = StageTimer('portfolio', symbols=len(symbols), period=period, 
+                           benchmark=benchmark)
+        with profiled('portfolio'):
+            result = self.get_engine().run_portfolio(symbols, period, benchmark, 
+                                                     timer=timer)
+        result['timer'] = timer
+        return result
+    
+    def finish_portfolio(self, portfolio_id, future):
+        if portfolio_id != self.portfolio_id:
+            return
+        try:
+            result = future.result()
+        except Exception as e:
+            self.set_status("")
+            self.show_colorful_message("Error", str(e), "error")
+            return
+        
+        self.portfolio_result = result
+        timer = result['timer']
+        try:
+            with timer.stage('render'):
+                self.plot_portfolio()
+        except Exception as e:
+            self.set_status("")
+            self.show_colorful_message("Error", f"Could not draw the portfolio: {e}", "error")
+            return
+        timer.log()
+        self.set_status(timer.summary())
+    
+    def plot_portfolio(self):
+        # Drawn once the price chart exists, i.e. matplotlib has been loaded.
+        result = self.portfolio_result
+        if result is None or self.chart is None:
+            return
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+        from charts import MatrixChart
+        from portfolio import latest
+        
+        if self.matrix_chart is None:
+            figure = Figure(figsize=(14, 6), dpi=100, facecolor=self.colors['card_bg'])
+            canvas = FigureCanvasTkAgg(figure, self.chart_card)
+            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=15, pady=(0, 15))
+            self.matrix_chart = MatrixChart(figure, self.colors)
+        
+        kind = self.matrix_var.get()
+        matrix = result['corr'] if kind == 'Correlation' else result['cov']
+        self.matrix_chart.update(result['symbols'], matrix, kind, 
+                                 latest(result['rolling_beta']), 
+                                 result['benchmark'], result['window'])
+    
+    def update_overlays(self):
+        if self.chart is None:
+            return
+        overlays = [name for name, var in self.overlay_vars.items() if var.get()]
+        self.chart.set_overlays(overlays, self.panel_var.get())
+    
+    def read_inputs(self):
         try:
             symbol = self.symbol_entry.get().strip().upper()
             period = self.period_var.get()
             pred_days = int(self.pred_days_entry.get())
+        except ValueError:
+            self.show_colorful_message("Error", 
+                                      "Prediction days must be a number", "error")
+            return None
+        
+        if not symbol:
+            self.show_colorful_message("Error", 
+                                      "Please enter a stock symbol", "error")
+            return None
+        
+        error = self.check_symbol(symbol)
+        if error:
+            self.show_colorful_message("Error", error, "error")
+            return None
+        
+        if pred_days <= 0 or pred_days > 365:
+            self.show_colorful_message("Error", 
+                                      "Prediction days must be between 1 and 365", 
+                                      "error")
+            return None
+        
+        return symbol, period, pred_days
+    
+    def analyze_stock(self):
+        inputs = self.read_inputs()
+        if inputs is None:
+            return
+        symbol, period, pred_days = inputs
+        model = self.model_var.get()
+        
+        if self.live_session is not None:
+            self.stop_live()
+        
+        if (period, pred_days, model) != self.watch_params:
+            self.watch_params = (period, pred_days, model)
+            if self.scheduler is not None:
+                self.scheduler.invalidate()
+        
+        self.request_id += 1
+        request_id = self.request_id
+        self.current_symbol = symbol
+        
+        self.analyze_button.config(text="ANALYZING...", 
+                                  bg=self.colors['warning'])
+        self.cancel_button.config(state=tk.NORMAL)
+        self.progress.start(12)
+        self.set_status(f"Fetching {symbol}...")
+        
+        future = self.executor.submit(self.run_analysis, request_id, 
+                                      symbol, period, pred_days, model)
+        future.add_done_callback(
+            lambda f: self.root.after(0, self.finish_analysis, request_id, f))
+    
+    def on_model_change(self):
+        # Switching models re-runs the shown symbol; fits already made for the
+        # same bars come from the engine's forecast cache.
+        if self.current_symbol and self.live_session is None:
+            self.analyze_stock()
+    
+    def run_analysis(self, request_id, symbol, period, pred_days, model):
+        timer = StageTimer('analysis', symbol=symbol, period=period, 
+                           pred_days=pred_days, model=model)
+        with profiled('analysis'):
+            self._check_cancelled(request_id)
+            df, company_name = self.fetch_stock_data(symbol, period, timer)
             
-            if not symbol:
-                self.show_colorful_message("Error", 
-                                          "Please enter a stock symbol", "error")
-                return
-            
-            if pred_days <= 0 or pred_days > 365:
-                self.show_colorful_message("Error", 
-                                          "Prediction days must be between 1 and 365", 
-                                          "error")
-                return
-            
-            self.analyze_button.config(text="ANALYZING...", 
-                                      bg=self.colors['warning'])
-            self.root.update()
-            
-            df, company_name = self.fetch_stock_data(symbol, period)
-            pred_dates, predictions, r2_score = self.predict_prices(df, pred_days)
-            
-            current_price = df['Close'].iloc[-1]
-            prev_price = df['Close'].iloc[-2]
-            change = current_price - prev_price
-            volume = df['Volume'].iloc[-1]
-            
-            pred_price = predictions[-1]
-            pred_change = pred_price - current_price
-            
-            self.update_info_display(company_name, current_price, change, 
-                                    volume, pred_price, pred_change)
-            self.plot_data(df, pred_dates, predictions)
-            
-            confidence = 'High' if r2_score > 0.8 else 'Medium' if r2_score > 0.5 else 'Low'
-            self.show_colorful_message("Success", 
-                                      f"Analysis completed for {company_name}\n\n"
-                                      f"Model Accuracy (R²): {r2_score:.4f}\n"
-                                      f"Confidence: {confidence}", 
-                                      "success")
+            self._check_cancelled(request_id)
+            self.root.after(0, self._set_request_status, request_id, 
+                            f"Fitting model for {symbol}...")
+            from engine import DEFAULT_BACKTEST_WINDOW, backtest, summarize
+            from indicators import compute_indicators
+            with timer.stage('predict'):
+                prediction = self.get_engine().predict(symbol, period, df, 
+                                                       pred_days, model)
+                result = summarize(df, pred_days, prediction)
+            with timer.stage('backtest'):
+                window = max(2, min(DEFAULT_BACKTEST_WINDOW, df['Close'].count() // 2))
+                result['backtest'] = backtest(df, pred_days, window).iloc[-1]
+            with timer.stage('indicators'):
+                result['indicators'] = compute_indicators(df)
+        
+        self._check_cancelled(request_id)
+        result['df'] = df
+        result['company_name'] = company_name
+        result['timer'] = timer
+        return result
+    
+    def finish_analysis(self, request_id, future):
+        if request_id != self.request_id:
+            return
         
+        self.reset_analysis_controls()
+        try:
+            result = future.result()
+        except AnalysisCancelled:
+            return
         except Exception as e:
             self.show_colorful_message("Error", str(e), "error")
+            return
+        
+        timer = result['timer']
+        with timer.stage('render'):
+            self.update_info_display(result['company_name'], result['current_price'], 
+                                    result['change'], result['volume'], 
+                                    result['pred_price'], result['pred_change'])
+            self.plot_data(result['df'], result['pred_dates'], result['predictions'], 
+                           result['indicators'])
+        self.pending_timer = timer
+        self.set_status(timer.summary())
+        
+        from engine import confidence_label
+        r2_score = result['r2_score']
+        confidence = confidence_label(r2_score)
+        bt = result['backtest']
+        if bt['samples']:
+            backtest_text = (f"Backtest ({bt.name}-day horizon): "
+                             f"MAPE {bt['mape']:.2f}%, "
+                             f"Hit Rate {bt['hit_rate'] * 100:.1f}%")
+        else:
+            backtest_text = "Backtest: not enough history"
+        self.show_colorful_message("Success", 
+                                  f"Analysis completed for {result['company_name']}\n\n"
+                                  f"Model: {result['model']}\n"
+                                  f"Model Accuracy (R²): {r2_score:.4f}\n"
+                                  f"Confidence: {confidence}\n"
+                                  f"{backtest_text}", 
+                                  "success")
+    
+    def cancel_analysis(self):
+        self.request_id += 1
+        self.reset_analysis_controls()
+        self.set_status("Analysis cancelled")
+    
+    def reset_analysis_controls(self):
+        self.progress.stop()
+        self.cancel_button.config(state=tk.DISABLED)
+        self.analyze_button.config(text="ANALYZE STOCK", 
+                                  bg=self.colors['accent_primary'])
+        self.set_status("")
+    
+    def set_status(self, text):
+        self.status_label.config(text=text)
+    
+    def _set_request_status(self, request_id, text):
+        if request_id == self.request_id:
+            self.set_status(text)
+    
+    def toggle_live(self):
+        if self.live_session is not None:
+            self.stop_live()
+            return
+        
+        inputs = self.read_inputs()
+        if inputs is None:
+            return
+        symbol, _, pred_days = inputs
         
-        finally:
-            self.analyze_button.config(text="ANALYZE STOCK", 
-                                      bg=self.colors['accent_primary'])
+        from live import LiveSession, ReplayFeed, YahooIntradayFeed
+        replay = os.environ.get(REPLAY_ENV)
+        if replay:
+            feed = ReplayFeed(replay, float(os.environ.get(REPLAY_SPEED_ENV, 60)))
+        else:
+            feed = YahooIntradayFeed(symbol)
+        
+        self.cancel_analysis()
+        self.live_id += 1
+        self.live_session = LiveSession(feed, pred_days=pred_days)
+        self.current_symbol = symbol
+        self.live_button.config(text="STOP LIVE", bg=self.colors['warning'])
+        self.set_status(f"Live: waiting for {symbol} bars...")
+        self.poll_live(self.live_id)
+    
+    def poll_live(self, live_id):
+        if live_id != self.live_id:
+            return
+        future = self.executor.submit(self.run_live_poll, self.live_session, 
+                                      self.current_symbol)
+        future.add_done_callback(
+            lambda f: self.root.after(0, self.apply_live_update, live_id, f))
+    
+    def run_live_poll(self, session, symbol):
+        changed = session.poll()
+        company_name = self.get_engine().metadata.get_name(
+            symbol, on_update=self._on_company_name)
+        return changed, company_name
+    
+    def apply_live_update(self, live_id, future):
+        if live_id != self.live_id:
+            return
+        
+        session = self.live_session
+        try:
+            changed, company_name = future.result()
+        except Exception as e:
+            self.set_status(f"Live update failed: {e}")
+            changed = False
+        
+        snapshot = session.snapshot() if changed else None
+        if snapshot:
+            self.update_info_display(company_name, snapshot['current_price'], 
+                                    snapshot['change'], snapshot['volume'], 
+                                    snapshot['pred_price'], snapshot['pred_change'])
+            pred_dates, predictions = session.forecast()
+            self.plot_data(session.buffer.to_frame(), pred_dates, predictions, 
+                           session.indicator_buffer.to_frame())
+            self.set_status(f"Live {self.current_symbol}: {snapshot['bars']} bars, "
+                            f"last {snapshot['time'][:19]} UTC")
+        
+        from live import ReplayFeed
+        if isinstance(session.feed, ReplayFeed):
+            if session.feed.finished():
+                self.stop_live()
+                self.set_status("Replay finished")
+                return
+            delay = REPLAY_POLL_MS
+        else:
+            delay = LIVE_POLL_MS
+        self.root.after(delay, self.poll_live, live_id)
+    
+    def stop_live(self):
+        self.live_id += 1
+        self.live_session = None
+        self.live_button.config(text="GO LIVE", bg=self.colors['accent_secondary'])
+        self.set_status("Live mode stopped")
+    
+    def _on_canvas_draw(self, ms):
+        timer = self.pending_timer
+        if timer is None:
+            return
+        self.pending_timer = None
+        timer.add('draw', ms)
+        timer.log()
+        self.set_status(timer.summary())
+    
+    def _check_cancelled(self, request_id):
+        if request_id != self.request_id:
+            raise AnalysisCancelled()
     
     def show_colorful_message(self, title, message, msg_type):
         if msg_type == "success":
@@ -447,6 +1087,7 @@ class StockPredictionApp:
             messagebox.showerror(title, message)
 
 def main():
+    configure_timing_log()
     root = tk.Tk()
     try:
         root.iconbitmap('icon.ico')
@@ -454,6 +1095,9 @@ def main():
         pass
     app = StockPredictionApp(root)
     root.mainloop()
+    if app.scheduler is not None:
+        app.scheduler.stop()
+    app.executor.shutdown(wait=False, cancel_futures=True)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,239 @@
+import argparse
+import json
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from engine import predict_many, predict_prices
+from indicators import BAR_INPUTS, IndicatorPipeline
+from instrumentation import import_cost
+from models import AUTO_MODEL
+from portfolio import analyze_portfolio
+from stock_data import HistoryCache, MetadataStore, SyntheticProvider
+from theme import COLORS
+from trend import stack_series, walk_forward_backtest
+
+SIZES = {'1mo': 21, '1y': 252, '5y': 1260, '20y': 5040}
+TICKER_COUNTS = [1, 10, 100, 1000]
+PRED_DAYS = 30
+
+STARTUP_MODULES = [
+    'tkinter', 'numpy', 'pandas', 'yfinance', 'matplotlib.figure',
+    'matplotlib.backends.backend_tkagg', 'charts', 'engine', 'cli', 'Stock_Market',
+]
+
+
+def measure(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return min(times), statistics.median(times)
+
+
+class Benchmark:
+    def __init__(self, sizes, ticker_counts, repeat):
+        self.sizes = sizes
+        self.ticker_counts = ticker_counts
+        self.repeat = repeat
+        self.provider = SyntheticProvider(years=20)
+        self.results = []
+        self._frames = {}
+    
+    def frames(self, size, count):
+        key = (size, count)
+        if key not in self._frames:
+            bars = SIZES[size]
+            self._frames[key] = [self.provider.frame(f"SYN{i:04d}", bars)
+                                 for i in range(count)]
+        return self._frames[key]
+    
+    def record(self, suite, size, tickers, fn, repeat=None):
+        best, median = measure(fn, repeat or self.repeat)
+        result = {'suite': suite, 'size': size, 'tickers': tickers,
+                  'best_ms': round(best, 3), 'median_ms': round(median, 3)}
+        self.results.append(result)
+        print(f"{suite:<12} {size:>5} {tickers:>6} {best:>12.2f} {median:>12.2f}",
+              flush=True)
+    
+    def bench_cache(self):
+        for size in self.sizes:
+            if size not in ('1mo', '1y', '5y'):
+                continue
+            with tempfile.TemporaryDirectory() as cache_dir:
+                cache = HistoryCache(SyntheticProvider(), cache_dir)
+                self.record('cache_cold', size, 1,
+                            lambda: (cache.invalidate('SYN0000'),
+                                     cache.get('SYN0000', size)))
+                self.record('cache_warm', size, 1, lambda: cache.get('SYN0000', size))
+            
+            with tempfile.TemporaryDirectory() as cache_dir:
+                cache = HistoryCache(SyntheticProvider(), cache_dir, storage='columnar')
+                self.record('columnar', size, 1, lambda: cache.get('SYN0000', size))
+        
+        with tempfile.TemporaryDirectory() as cache_dir:
+            provider = SyntheticProvider()
+            metadata = MetadataStore(provider, cache_dir)
+            self.record('metadata', '-', 1,
+                        lambda: metadata.get_name('SYN0000', refresh=False))
+    
+    def bench_predict(self):
+        for size in self.sizes:
+            df = self.frames(size, 1)[0]
+            self.record('predict', size, 1, lambda: predict_prices(df, PRED_DAYS))
+            self.record('predict_auto', size, 1,
+                        lambda: predict_prices(df, PRED_DAYS, AUTO_MODEL))
+    
+    def bench_batch_fit(self):
+        for size in self.sizes:
+            for count in self.ticker_counts:
+                frames = self.frames(size, count)
+                self.record('batch_fit', size, count,
+                            lambda: predict_many(frames, PRED_DAYS))
+    
+    def bench_backtest(self):
+        for size in self.sizes:
+            window = min(60, SIZES[size] // 2)
+            for count in self.ticker_counts:
+                closes = stack_series([df['Close'].to_numpy()
+                                       for df in self.frames(size, count)])
+                self.record('backtest', size, count,
+                            lambda: walk_forward_backtest(closes, window, PRED_DAYS))
+    
+    def bench_indicators(self):
+        for size in self.sizes:
+            for count in self.ticker_counts:
+                inputs = [stack_series([df[column].to_numpy() for df in self.frames(size, count)])
+                          for column in BAR_INPUTS]
+                self.record('indicators', size, count,
+                            lambda: IndicatorPipeline().compute(*inputs))
+            
+            # Appending one bar to a warm pipeline, as live mode does.
+            df = self.frames(size, 1)[0]
+            inputs = [df[column].to_numpy() for column in BAR_INPUTS]
+            pipeline = IndicatorPipeline()
+            pipeline.compute(*[values[:-1] for values in inputs])
+            self.record('ind_append', size, 1,
+                        lambda: pipeline.revise_last(*[values[-1:] for values in inputs]))
+    
+    def bench_portfolio(self):
+        for size in self.sizes:
+            for count in self.ticker_counts:
+                if count < 2:
+                    continue
+                frames = {f"SYN{i:04d}": df for i, df in enumerate(self.frames(size, count))}
+                self.record('portfolio', size, count,
+                            lambda: analyze_portfolio(frames, 'SYN0000'))
+    
+    def bench_chart(self):
+        try:
+            import matplotlib
+            matplotlib.use('Agg')
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            from matplotlib.figure import Figure
+            from charts import PriceChart
+        except ImportError:
+            print("chart suite skipped: matplotlib is not installed")
+            return
+        
+        figure = Figure(figsize=(14, 7), dpi=100)
+        canvas = FigureCanvasAgg(figure)
+        # Agg's draw_idle draws right away; skip it so each iteration is one draw.
+        canvas.draw_idle = lambda *args, **kwargs: None
+        chart = PriceChart(figure, COLORS)
+        for size in self.sizes:
+            df = self.frames(size, 1)[0]
+            pred_dates, predictions, _, _ = predict_prices(df, PRED_DAYS)
+            self.record('chart', size, 1,
+                        lambda: (chart.update(df, pred_dates, predictions),
+                                 figure.canvas.draw()))
+    
+    
+    def bench_startup(self):
+        for module in STARTUP_MODULES:
+            try:
+                costs = [import_cost(module) for _ in range(self.repeat)]
+            except ImportError as e:
+                print(f"startup {module} skipped: {e}")
+                continue
+            result = {'suite': 'startup', 'module': module,
+                      'best_ms': round(min(costs), 3),
+                      'median_ms': round(statistics.median(costs), 3)}
+            self.results.append(result)
+            print(f"{'import':<12} {module:>40} {min(costs):>12.2f} "
+                  f"{statistics.median(costs):>12.2f}", flush=True)
+
+
+def reference_trend(closes, days):
+    # np.polyfit over the non-NaN closes, the fit scikit-learn used to do.
+    y = closes[~np.isnan(closes)]
+    x = np.arange(len(y))
+    slope, intercept = np.polyfit(x, y, 1)
+    residual = ((y - (intercept + slope * x)) ** 2).sum()
+    total = ((y - y.mean()) ** 2).sum()
+    r2 = 1.0 - residual / total if total > 0 else 1.0
+    return intercept + slope * np.arange(len(y), len(y) + days), r2
+
+
+def check_trends(provider=None, tolerance=1e-9):
+    # The vectorized trend fit has to match a plain least-squares fit, with
+    # NaN gaps and very short histories included. Returns the mismatches.
+    provider = provider or SyntheticProvider(years=5)
+    frames = [provider.frame(f"SYN{i:04d}", bars) for i, bars in
+              enumerate([2, 3, 21, 252, 1260])]
+    gappy = provider.frame('GAPS', 252)
+    gappy.iloc[[0, 5, 6, 100, 251], gappy.columns.get_loc('Close')] = np.nan
+    frames.append(gappy)
+    
+    failures = []
+    results = predict_many(frames, PRED_DAYS)
+    for i, df in enumerate(frames):
+        expected, expected_r2 = reference_trend(df['Close'].to_numpy(), PRED_DAYS)
+        for path, (_, predictions, r2, _) in (('predict_many', results[i]),
+                                              ('predict_prices', predict_prices(df, PRED_DAYS))):
+            error = np.abs(predictions - expected).max() / np.abs(expected).max()
+            if error > tolerance or abs(r2 - expected_r2) > tolerance:
+                failures.append(f"{path} on {len(df)} bars: prediction error {error:.3g}, "
+                                f"r2 {r2:.12f} != {expected_r2:.12f}")
+    return failures
+
+
+SUITES = ['startup', 'cache', 'predict', 'batch_fit', 'backtest', 'indicators', 'portfolio', 'chart']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Offline benchmarks on deterministic synthetic OHLCV data")
+    parser.add_argument('--suite', action='append', choices=SUITES,
+                        help="suite to run (repeatable, default: all)")
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=list(SIZES))
+    parser.add_argument('--tickers', nargs='+', type=int, default=TICKER_COUNTS)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', metavar='PATH', help="also write results as JSON")
+    parser.add_argument('--check', action='store_true',
+                        help="only check the trend fit against np.polyfit")
+    args = parser.parse_args(argv)
+    
+    if args.check:
+        failures = check_trends()
+        for failure in failures:
+            print(failure)
+        print("trend check failed" if failures else "trend check passed")
+        return 1 if failures else 0
+    
+    bench = Benchmark(args.sizes, args.tickers, args.repeat)
+    print(f"{'suite':<12} {'size':>5} {'tickers':>6} {'best ms':>12} {'median ms':>12}")
+    for suite in args.suite or SUITES:
+        getattr(bench, f"bench_{suite}")()
+    
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(bench.results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
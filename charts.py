@@ -0,0 +1,311 @@
+import numpy as np
+import matplotlib.dates as mdates
+from matplotlib.collections import PolyCollection
+
+from downsample import max_buckets, minmax_downsample, visible_slice
+
+VOLUME_HIGH_COLOR = '#ffd93d'
+VOLUME_LOW_COLOR = '#6c5ce7'
+
+# Overlay name -> indicator columns. Price overlays share the price axis, panel
+# overlays get their own y axis on top of the volume bars.
+PRICE_OVERLAYS = {
+    'SMA': ['sma'],
+    'EMA': ['ema'],
+    'Bollinger': ['bb_upper', 'bb_mid', 'bb_lower'],
+    'VWAP': ['vwap'],
+}
+PANEL_OVERLAYS = {
+    'RSI': ['rsi'],
+    'MACD': ['macd', 'macd_signal'],
+}
+
+PRICE_COLUMNS = {column for columns in PRICE_OVERLAYS.values() for column in columns}
+
+INDICATOR_STYLES = {
+    'sma': ('#ffd93d', '-', 'SMA 20'),
+    'ema': ('#4facfe', '-', 'EMA 20'),
+    'bb_upper': ('#a8b2d1', ':', 'Bollinger 20, 2'),
+    'bb_mid': ('#a8b2d1', '-', '_nolegend_'),
+    'bb_lower': ('#a8b2d1', ':', '_nolegend_'),
+    'vwap': ('#f64c72', '-', 'VWAP 20'),
+    'rsi': ('#00f2a0', '-', 'RSI 14'),
+    'macd': ('#4facfe', '-', 'MACD 12, 26'),
+    'macd_signal': ('#f5576c', '-', 'Signal 9'),
+}
+
+
+def fill_verts(x, y):
+    if len(x) == 0:
+        return np.empty((0, 2))
+    return np.concatenate([[[x[0], 0.0]], np.column_stack([x, y]), [[x[-1], 0.0]]])
+
+
+def bar_verts(x, heights, width=1.0):
+    left = x - width / 2
+    right = x + width / 2
+    zeros = np.zeros_like(heights)
+    return np.stack([
+        np.column_stack([left, zeros]),
+        np.column_stack([left, heights]),
+        np.column_stack([right, heights]),
+        np.column_stack([right, zeros]),
+    ], axis=1)
+
+
+def volume_colors(heights, mean):
+    return np.where(heights >= mean, VOLUME_HIGH_COLOR, VOLUME_LOW_COLOR)
+
+
+class PriceChart:
+    def __init__(self, figure, colors):
+        self.figure = figure
+        self.colors = colors
+        self.figure.patch.set_facecolor(colors['card_bg'])
+        self.x = None
+        self.indicators = None
+        self.overlays = []
+        self.panel = None
+        self.overlay_lines = {}
+        self.ax3 = None
+        self._updating = False
+        
+        self.ax1 = figure.add_subplot(2, 1, 1, facecolor=colors['bg_secondary'])
+        self.ax2 = figure.add_subplot(2, 1, 2, facecolor=colors['bg_secondary'])
+        
+        self.price_line, = self.ax1.plot([], [], label='Actual Price',
+                                         color='#00f2fe', linewidth=3, alpha=0.8)
+        self.price_fill = self.ax1.fill_between([], [], alpha=0.3, color='#00f2fe')
+        
+        self.pred_line, = self.ax1.plot([], [], label='Predicted Price',
+                                        color='#f093fb', linestyle='--', linewidth=3,
+                                        marker='o', markersize=4, alpha=0.9)
+        self.pred_fill = self.ax1.fill_between([], [], alpha=0.2, color='#f093fb')
+        
+        self.volume_bars = PolyCollection([], alpha=0.7, linewidth=0)
+        self.ax2.add_collection(self.volume_bars)
+        
+        self._style_axis(self.ax1, 'Stock Price Analysis & Forecast',
+                         'Price ($)', colors['success'])
+        self._style_axis(self.ax2, 'Trading Volume', 'Volume', colors['warning'])
+        self.ax1.legend(loc='upper left', framealpha=0.9, fontsize=10)
+        self.ax1.xaxis_date()
+        self.ax2.xaxis_date()
+        
+        self.figure.tight_layout(pad=3)
+        
+        self.ax1.callbacks.connect('xlim_changed', self._on_view_change)
+        self.ax2.callbacks.connect('xlim_changed', self._on_view_change)
+        self.figure.canvas.mpl_connect('resize_event', self._on_view_change)
+    
+    def _style_axis(self, ax, title, ylabel, title_color):
+        ax.set_title(title, fontsize=16, fontweight='bold',
+                     color=title_color, pad=20)
+        ax.set_xlabel('Date', fontsize=11, color=self.colors['text_secondary'])
+        ax.set_ylabel(ylabel, fontsize=11, color=self.colors['text_secondary'])
+        ax.grid(True, alpha=0.2, linestyle='--',
+                color=self.colors['text_secondary'])
+        ax.tick_params(colors=self.colors['text_secondary'])
+        
+        for spine in ax.spines.values():
+            spine.set_color(self.colors['text_secondary'])
+            spine.set_linewidth(0.5)
+    
+    def update(self, df, pred_dates, predictions, indicators=None):
+        self.x = mdates.date2num(df.index)
+        self.close = df['Close'].to_numpy(dtype=float)
+        self.volume = df['Volume'].to_numpy(dtype=float)
+        self.volume_mean = np.nanmean(self.volume)
+        self.bar_width = float(np.median(np.diff(self.x))) if len(self.x) > 1 else 1.0
+        pred_x = mdates.date2num(pred_dates)
+        predictions = np.asarray(predictions, dtype=float)
+        self.indicators = None
+        if indicators is not None:
+            self.indicators = {column: indicators[column].to_numpy(dtype=float)
+                               for column in INDICATOR_STYLES}
+        
+        self.pred_line.set_data(pred_x, predictions)
+        self.pred_fill.set_verts([fill_verts(pred_x, predictions)])
+        
+        self._updating = True
+        try:
+            self._rescale(self.ax1, np.concatenate([self.x, pred_x]),
+                          np.concatenate([self.close, predictions, [0.0]]))
+            half = self.bar_width / 2
+            self._rescale(self.ax2, np.concatenate([self.x - half, self.x + half]),
+                          np.concatenate([self.volume, [0.0]]))
+        finally:
+            self._updating = False
+        
+        self._update_overlays()
+        self.render()
+        self.figure.canvas.draw_idle()
+    
+    def set_overlays(self, overlays, panel=None):
+        self.overlays = [name for name in PRICE_OVERLAYS if name in overlays]
+        self.panel = panel if panel in PANEL_OVERLAYS else None
+        if self.x is None:
+            return
+        self._update_overlays()
+        self.render()
+        self.figure.canvas.draw_idle()
+    
+    def _overlay_columns(self):
+        if self.indicators is None:
+            return []
+        columns = [column for name in self.overlays for column in PRICE_OVERLAYS[name]]
+        if self.panel:
+            columns += PANEL_OVERLAYS[self.panel]
+        return columns
+    
+    def _overlay_line(self, column):
+        line = self.overlay_lines.get(column)
+        if line is None:
+            color, linestyle, label = INDICATOR_STYLES[column]
+            ax = self.ax1 if column in PRICE_COLUMNS else self._panel_axis()
+            line, = ax.plot([], [], color=color, linestyle=linestyle, linewidth=1.5,
+                            alpha=0.9, label=label)
+            self.overlay_lines[column] = line
+        return line
+    
+    def _panel_axis(self):
+        if self.ax3 is None:
+            self.ax3 = self.ax2.twinx()
+            self.ax3.tick_params(colors=self.colors['text_secondary'])
+        return self.ax3
+    
+    def _update_overlays(self):
+        active = self._overlay_columns()
+        for column in active:
+            self._overlay_line(column)
+        for column, line in self.overlay_lines.items():
+            line.set_visible(column in active)
+        
+        handles = [self.price_line, self.pred_line]
+        handles += [self.overlay_lines[column] for column in active
+                    if column in PRICE_COLUMNS
+                    and not self.overlay_lines[column].get_label().startswith('_')]
+        self.ax1.legend(handles=handles, loc='upper left', framealpha=0.9, fontsize=10)
+        
+        if self.ax3 is None:
+            return
+        panel_columns = [column for column in active if column not in PRICE_COLUMNS]
+        self.ax3.set_visible(bool(panel_columns))
+        if not panel_columns:
+            return
+        self.ax3.legend(handles=[self.overlay_lines[column] for column in panel_columns],
+                        loc='upper right', framealpha=0.9, fontsize=9)
+        if self.panel == 'RSI':
+            self.ax3.set_ylim(0, 100)
+            return
+        values = np.concatenate([self.indicators[column] for column in panel_columns])
+        if np.isnan(values).all():
+            return
+        low, high = np.nanmin(values), np.nanmax(values)
+        pad = (high - low) * 0.05 or 1.0
+        self.ax3.set_ylim(low - pad, high + pad)
+    
+    def render(self):
+        # Only the visible part of the full-resolution data is drawn, reduced to
+        # about one bucket per pixel column, so the artist size stays bounded.
+        if self.x is None:
+            return
+        
+        visible = visible_slice(self.x, self.ax1.get_xlim())
+        x, close = minmax_downsample(self.x[visible], self.close[visible],
+                                     self._pixel_width(self.ax1))
+        self.price_line.set_data(x, close)
+        self.price_fill.set_verts([fill_verts(x, close)])
+        
+        visible = visible_slice(self.x, self.ax2.get_xlim())
+        x, volume, width = max_buckets(self.x[visible], self.volume[visible],
+                                       self._pixel_width(self.ax2), self.bar_width)
+        self.volume_bars.set_verts(bar_verts(x, volume, width))
+        self.volume_bars.set_facecolor(volume_colors(volume, self.volume_mean))
+        
+        for column in self._overlay_columns():
+            line = self.overlay_lines[column]
+            visible = visible_slice(self.x, line.axes.get_xlim())
+            x, values = minmax_downsample(self.x[visible], self.indicators[column][visible],
+                                          self._pixel_width(line.axes))
+            line.set_data(x, values)
+    
+    def _on_view_change(self, *args):
+        if self._updating or self.x is None:
+            return
+        self.render()
+        self.figure.canvas.draw_idle()
+    
+    def _pixel_width(self, ax):
+        return max(int(ax.bbox.width), 1)
+    
+    def _rescale(self, ax, xs, ys):
+        ax.ignore_existing_data_limits = True
+        ax.update_datalim(np.column_stack([
+            [np.nanmin(xs), np.nanmax(xs)], [np.nanmin(ys), np.nanmax(ys)]]))
+        ax.autoscale_view()
+
+
+MATRIX_LABEL_LIMIT = 40
+MATRIX_STYLES = {
+    'Correlation': ('RdBu_r', 'Return Correlation'),
+    'Covariance': ('viridis', 'Daily Return Covariance'),
+}
+
+
+class MatrixChart:
+    # Heatmap of a symbols x symbols matrix, next to each symbol's latest
+    # rolling beta. The image and colorbar are created once and updated in place.
+    def __init__(self, figure, colors):
+        self.figure = figure
+        self.colors = colors
+        self.figure.patch.set_facecolor(colors['card_bg'])
+        grid = figure.add_gridspec(1, 2, width_ratios=[3, 1])
+        self.ax1 = figure.add_subplot(grid[0], facecolor=colors['bg_secondary'])
+        self.ax2 = figure.add_subplot(grid[1], facecolor=colors['bg_secondary'])
+        self.image = self.ax1.imshow(np.zeros((1, 1)), interpolation='nearest', aspect='auto')
+        self.colorbar = figure.colorbar(self.image, ax=self.ax1, fraction=0.04, pad=0.02)
+        self.colorbar.ax.tick_params(colors=colors['text_secondary'])
+        self.beta_bars = None
+        for ax in (self.ax1, self.ax2):
+            ax.tick_params(colors=colors['text_secondary'])
+            for spine in ax.spines.values():
+                spine.set_color(colors['text_secondary'])
+                spine.set_linewidth(0.5)
+    
+    def update(self, symbols, matrix, kind, betas, benchmark, window):
+        cmap, title = MATRIX_STYLES[kind]
+        self.image.set_data(matrix)
+        self.image.set_cmap(cmap)
+        self.image.set_extent((-0.5, len(symbols) - 0.5, len(symbols) - 0.5, -0.5))
+        if kind == 'Correlation':
+            self.image.set_clim(-1, 1)
+        else:
+            limit = np.nanmax(np.abs(matrix)) if np.isfinite(matrix).any() else 1.0
+            self.image.set_clim(-limit, limit)
+        self.colorbar.update_normal(self.image)
+        self.ax1.set_title(title, fontsize=16, fontweight='bold',
+                           color=self.colors['success'], pad=20)
+        
+        if self.beta_bars is not None:
+            self.beta_bars.remove()
+        positions = np.arange(len(symbols))
+        colors = np.where(betas >= 1, VOLUME_HIGH_COLOR, VOLUME_LOW_COLOR)
+        self.beta_bars = self.ax2.barh(positions, np.nan_to_num(betas), color=colors, alpha=0.8)
+        self.ax2.set_ylim(len(symbols) - 0.5, -0.5)
+        self.ax2.relim()
+        self.ax2.autoscale_view(scaley=False)
+        self.ax2.set_title(f"{window}-day Beta vs {benchmark}", fontsize=16,
+                           fontweight='bold', color=self.colors['warning'], pad=20)
+        self.ax2.grid(True, axis='x', alpha=0.2, linestyle='--',
+                      color=self.colors['text_secondary'])
+        
+        # Symbol names only while they stay readable.
+        labels = symbols if len(symbols) <= MATRIX_LABEL_LIMIT else []
+        ticks = positions if labels else []
+        self.ax1.set_xticks(ticks, labels, rotation=90, fontsize=8)
+        self.ax1.set_yticks(ticks, labels, fontsize=8)
+        self.ax2.set_yticks(ticks, labels, fontsize=8)
+        
+        self.figure.tight_layout(pad=2)
+        self.figure.canvas.draw_idle()
@@ -0,0 +1,130 @@
+import argparse
+import csv
+import json
+import sys
+
+from engine import (AnalysisEngine, BACKTEST_FIELDS, DEFAULT_BACKTEST_WINDOW,
+                    INDICATOR_FIELDS, SUMMARY_FIELDS)
+from instrumentation import StageTimer, configure_timing_log, profiled
+from model_names import DEFAULT_MODEL, MODEL_CHOICES
+from portfolio import DEFAULT_BENCHMARK, DEFAULT_BETA_WINDOW, PORTFOLIO_FIELDS, portfolio_records
+from report import REPORT_FIELDS, REPORT_FORMATS, run_reports
+from stock_data import PERIODS
+
+
+def read_symbols(path):
+    symbols = []
+    with open(path) as f:
+        for line in f:
+            line = line.split('#', 1)[0]
+            symbols.extend(s for s in line.replace(',', ' ').split() if s)
+    return symbols
+
+
+def cli_main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Analyze many stock symbols without the GUI")
+    parser.add_argument('symbols', nargs='*', help="ticker symbols to analyze")
+    parser.add_argument('-f', '--file', help="file with symbols, one or more per line")
+    parser.add_argument('-p', '--period', choices=PERIODS, default='1y')
+    parser.add_argument('-d', '--days', type=int, default=30,
+                        help="number of days to predict")
+    parser.add_argument('-m', '--model', choices=MODEL_CHOICES, default=DEFAULT_MODEL,
+                        help="forecasting model; 'auto' picks the best on held-out bars")
+    parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="number of fitting processes")
+    parser.add_argument('-o', '--output', help="write results to this file")
+    parser.add_argument('--backtest', action='store_true',
+                        help="report walk-forward forecast errors per horizon")
+    parser.add_argument('--window', type=int, default=DEFAULT_BACKTEST_WINDOW,
+                        help="training window in bars for --backtest")
+    parser.add_argument('--indicators', action='store_true',
+                        help="report the latest SMA/EMA/RSI/MACD/Bollinger/VWAP values")
+    parser.add_argument('--report', metavar='DIR',
+                        help="render a chart and HTML page per symbol into DIR")
+    parser.add_argument('--report-format', nargs='+', choices=REPORT_FORMATS,
+                        default=['png'], help="chart image formats for --report")
+    parser.add_argument('--portfolio', action='store_true',
+                        help="report volatility, beta and benchmark correlation per symbol")
+    parser.add_argument('--benchmark', default=DEFAULT_BENCHMARK,
+                        help="benchmark symbol for --portfolio betas")
+    parser.add_argument('--beta-window', type=int, default=DEFAULT_BETA_WINDOW,
+                        help="rolling beta window in days for --portfolio")
+    parser.add_argument('--timings', action='store_true',
+                        help="log per-stage timings as JSON lines to stderr")
+    parser.add_argument('--profile', metavar='DIR',
+                        help="write a cProfile dump of the run into DIR")
+    args = parser.parse_args(argv)
+    
+    symbols = [s.upper() for s in args.symbols]
+    if args.file:
+        symbols.extend(s.upper() for s in read_symbols(args.file))
+    if not symbols:
+        parser.error("no symbols given")
+    if args.days <= 0 or args.days > 365:
+        parser.error("prediction days must be between 1 and 365")
+    if args.window < 2:
+        parser.error("backtest window must be at least 2 bars")
+    if args.beta_window < 2:
+        parser.error("beta window must be at least 2 days")
+    if sum(map(bool, (args.backtest, args.indicators, args.report, args.portfolio))) > 1:
+        parser.error("--backtest, --indicators, --report and --portfolio can't be combined")
+    
+    configure_timing_log('-' if args.timings else None)
+    mode = ('backtest' if args.backtest else 'indicators' if args.indicators
+            else 'report' if args.report else 'portfolio' if args.portfolio else 'batch')
+    timer = StageTimer(mode, symbols=len(symbols), period=args.period, days=args.days,
+                       model=args.model)
+    # Profiles the whole run, including modes that do their work up front.
+    with profiled('cli', args.profile):
+        engine = AnalysisEngine()
+        if args.portfolio:
+            fields = PORTFOLIO_FIELDS
+            benchmark = args.benchmark.upper()
+            try:
+                result = engine.run_portfolio(symbols, args.period, benchmark,
+                                              args.beta_window, timer=timer)
+            except ValueError as e:
+                print(f"error: {e}", file=sys.stderr)
+                return 1
+            records = portfolio_records(result, symbols)
+        elif args.report:
+            fields = REPORT_FIELDS
+            records = run_reports(engine, symbols, args.period, args.days, args.report,
+                                  model=args.model, formats=args.report_format,
+                                  workers=args.workers, timer=timer)
+        elif args.indicators:
+            fields = INDICATOR_FIELDS
+            records = engine.run_indicators(symbols, args.period, workers=args.workers,
+                                            timer=timer)
+        elif args.backtest:
+            fields = BACKTEST_FIELDS
+            records = engine.run_backtest(symbols, args.period, args.days, args.window,
+                                          workers=args.workers, timer=timer)
+        else:
+            fields = SUMMARY_FIELDS
+            records = engine.run_batch(symbols, args.period, args.days,
+                                       workers=args.workers, timer=timer, model=args.model)
+        
+        out = open(args.output, 'w', newline='') if args.output else sys.stdout
+        try:
+            if args.format == 'csv':
+                writer = csv.DictWriter(out, fieldnames=fields)
+                writer.writeheader()
+            
+            for record in records:
+                if args.format == 'csv':
+                    writer.writerow(record)
+                else:
+                    out.write(json.dumps(record) + '\n')
+                out.flush()
+        finally:
+            if out is not sys.stdout:
+                out.close()
+    timer.log()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(cli_main())
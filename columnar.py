@@ -0,0 +1,226 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+# Date is the bar's local trading date as days since 1970-01-01.
+STORE_FIELDS = [
+    ('Date', np.int32),
+    ('Open', np.float32),
+    ('High', np.float32),
+    ('Low', np.float32),
+    ('Close', np.float32),
+    ('Volume', np.uint32),
+]
+
+ROW_BARS = 12288
+SEGMENT_ROWS = 256
+FREE_ROW_GRACE = 24 * 3600
+VOLUME_MAX = np.iinfo(np.uint32).max
+
+
+class ColumnarStore:
+    # Daily bars for the whole universe as one row per symbol. Each field lives
+    # in memory-mapped segment files of SEGMENT_ROWS rows, so only the pages of
+    # the symbols actually read are loaded, and adding symbols creates new
+    # segments instead of resizing files. A symbol's bars sit at the start of
+    # its row in date order, so a frame is a slice of the mapped pages. Volume
+    # is kept as uint32, the smallest integer type that holds daily volumes.
+    #
+    # Frames are read-only views, and the bars under them never change: new
+    # bars are appended after the stored ones, and any other change writes the
+    # symbol to another row before meta.json is pointed at it. The old row is
+    # only reused after FREE_ROW_GRACE. Several processes can share the
+    # directory: meta.json is only changed under a lock file, and re-read
+    # whenever another process has replaced it.
+    def __init__(self, cache_dir):
+        self.directory = os.path.join(cache_dir, 'columnar')
+        self._lock = threading.RLock()
+        self._segments = {}
+        self._meta_path = os.path.join(self.directory, 'meta.json')
+        self._lock_path = os.path.join(self.directory, 'lock')
+        self._meta = None
+        self._meta_stamp = None
+        self._reload_meta()
+    
+    def __contains__(self, symbol):
+        return symbol in self._reload_meta()['symbols']
+    
+    def symbols(self):
+        return list(self._reload_meta()['symbols'])
+    
+    def trading_days(self, index):
+        # Local trading date of every timestamp.
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        return index.normalize().to_numpy().astype('datetime64[D]')
+    
+    def put(self, symbol, df):
+        # Bars without a close are not stored.
+        df = df[df['Close'].notna()]
+        if len(df) > ROW_BARS:
+            raise ValueError(f"{symbol} has more than {ROW_BARS} bars")
+        columns = {'Date': self.trading_days(df.index).astype(np.int32)}
+        for field, dtype in STORE_FIELDS[1:]:
+            values = df[field].to_numpy(dtype=float)
+            if dtype == np.uint32:
+                values = np.clip(np.nan_to_num(values), 0, VOLUME_MAX)
+            columns[field] = values.astype(dtype)
+        tz = str(df.index.tz) if df.index.tz is not None else None
+        
+        with self._locked():
+            entry = self._meta['symbols'].get(symbol)
+            start = self._unchanged_bars(entry, columns, tz)
+            if start is None:
+                row, start = self._take_row(), 0
+                if entry is not None:
+                    self._free_row(entry['row'])
+            else:
+                row = entry['row']
+            
+            arrays, offset = self._row(row)
+            for field, _ in STORE_FIELDS:
+                arrays[field][offset, start:len(df)] = columns[field][start:]
+            self._meta['symbols'][symbol] = {'row': row, 'bars': len(df), 'tz': tz}
+            self._save_meta()
+    
+    def frame(self, symbol):
+        # A DataFrame over the mapped rows. Column data is not copied; only the
+        # date index is built.
+        entry = self._reload_meta()['symbols'].get(symbol)
+        if entry is None or not entry['bars']:
+            return None
+        arrays, offset = self._row(entry['row'])
+        columns = {}
+        for field, _ in STORE_FIELDS:
+            values = arrays[field][offset, :entry['bars']].view(np.ndarray)
+            values.flags.writeable = False
+            columns[field] = values
+        
+        index = pd.DatetimeIndex(columns.pop('Date').astype('datetime64[D]'), name='Date')
+        if entry.get('tz'):
+            index = index.tz_localize(entry['tz'])
+        return pd.DataFrame(columns, index=index, copy=False)
+    
+    def remove(self, symbol):
+        with self._locked():
+            entry = self._meta['symbols'].pop(symbol, None)
+            if entry is None:
+                return
+            self._free_row(entry['row'])
+            self._save_meta()
+    
+    def _unchanged_bars(self, entry, columns, tz):
+        # Number of stored bars `columns` starts with unchanged, or None if any
+        # of them differ and the symbol has to move to another row.
+        if entry is None or entry.get('tz') != tz or len(columns['Date']) < entry['bars']:
+            return None
+        arrays, offset = self._row(entry['row'])
+        bars = entry['bars']
+        for field, _ in STORE_FIELDS:
+            if not np.array_equal(arrays[field][offset, :bars], columns[field][:bars],
+                                  equal_nan=True):
+                return None
+        return bars
+    
+    def _take_row(self):
+        now = time.time()
+        free = self._meta['free']
+        for i, (row, freed) in enumerate(free):
+            if now - freed >= FREE_ROW_GRACE:
+                del free[i]
+                return row
+        self._meta['rows'] += 1
+        return self._meta['rows'] - 1
+    
+    def _free_row(self, row):
+        self._meta['free'].append([row, time.time()])
+    
+    def _row(self, row):
+        segment, offset = divmod(row, SEGMENT_ROWS)
+        return self._segment(segment), offset
+    
+    def _segment(self, segment):
+        with self._lock:
+            arrays = self._segments.get(segment)
+            if arrays is None:
+                os.makedirs(self.directory, exist_ok=True)
+                arrays = {}
+                for field, dtype in STORE_FIELDS:
+                    path = os.path.join(self.directory, f"{field}.{segment:04d}.bin")
+                    mode = 'r+' if os.path.exists(path) else 'w+'
+                    arrays[field] = np.memmap(path, dtype=dtype, mode=mode,
+                                              shape=(SEGMENT_ROWS, ROW_BARS))
+                self._segments[segment] = arrays
+            return arrays
+    
+    @contextmanager
+    def _locked(self):
+        # Exclusive across threads and processes, with meta.json freshly read.
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._lock_path, 'a+b') as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                try:
+                    self._reload_meta()
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+                    else:
+                        f.seek(0)
+                        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    
+    def _reload_meta(self):
+        # meta.json is only ever replaced whole, so a changed mtime or size
+        # means another process (or store) has written it.
+        with self._lock:
+            try:
+                stat = os.stat(self._meta_path)
+                stamp = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+            except OSError:
+                stamp = None
+            if self._meta is None or stamp != self._meta_stamp:
+                self._meta = self._load_meta()
+                self._meta_stamp = stamp
+            return self._meta
+    
+    def _load_meta(self):
+        try:
+            with open(self._meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return {'bars': ROW_BARS, 'rows': 0, 'free': [], 'symbols': {}}
+        if meta.get('bars') != ROW_BARS:
+            raise ValueError(f"columnar store at {self.directory} has a different "
+                             f"layout; delete the directory to rebuild it")
+        return meta
+    
+    def _save_meta(self):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self._meta_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self._meta, f)
+        os.replace(tmp_path, self._meta_path)
+        stat = os.stat(self._meta_path)
+        self._meta_stamp = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    
+    def flush(self):
+        with self._lock:
+            for arrays in self._segments.values():
+                for values in arrays.values():
+                    values.flush()
@@ -0,0 +1,50 @@
+import numpy as np
+
+
+def visible_slice(x, xlim):
+    lo = max(np.searchsorted(x, xlim[0]) - 1, 0)
+    hi = min(np.searchsorted(x, xlim[1]) + 1, len(x))
+    return slice(lo, hi)
+
+
+def bucket_starts(x, buckets):
+    # Start index of every non-empty bucket when [x[0], x[-1]] is split into
+    # `buckets` equal-width columns, usually one per screen pixel.
+    edges = np.linspace(x[0], x[-1], buckets + 1)[1:-1]
+    starts = np.unique(np.concatenate([[0], np.searchsorted(x, edges)]))
+    return starts[starts < len(x)]
+
+
+def minmax_downsample(x, y, buckets):
+    # Keep the first, last, minimum and maximum point of every pixel column.
+    # The drawn line is indistinguishable from the full series at that width,
+    # and the cost is a handful of vectorized reductions.
+    if len(x) <= 4 * buckets:
+        return x, y
+    
+    starts = bucket_starts(x, buckets)
+    ends = np.append(starts[1:], len(x)) - 1
+    segment = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(x))))
+    
+    mins = np.fmin.reduceat(y, starts)
+    maxs = np.fmax.reduceat(y, starts)
+    _, min_idx = np.unique(segment[y == mins[segment]], return_index=True)
+    _, max_idx = np.unique(segment[y == maxs[segment]], return_index=True)
+    min_idx = np.flatnonzero(y == mins[segment])[min_idx]
+    max_idx = np.flatnonzero(y == maxs[segment])[max_idx]
+    
+    keep = np.unique(np.concatenate([starts, ends, min_idx, max_idx]))
+    return x[keep], y[keep]
+
+
+def max_buckets(x, heights, buckets, width=1.0):
+    # Merge bars that share a pixel column into one bar spanning the column,
+    # as tall as the tallest bar it replaces.
+    if len(x) <= buckets:
+        return x, heights, np.full(len(x), width)
+    
+    starts = bucket_starts(x, buckets)
+    ends = np.append(starts[1:], len(x)) - 1
+    left = x[starts] - width / 2
+    right = x[ends] + width / 2
+    return (left + right) / 2, np.fmax.reduceat(heights, starts), right - left
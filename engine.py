@@ -0,0 +1,296 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+import pandas as pd
+
+from indicators import INDICATOR_COLUMNS, compute_many
+from instrumentation import StageTimer
+from models import DEFAULT_MODEL, fit_model
+from portfolio import DEFAULT_BENCHMARK, DEFAULT_BETA_WINDOW, analyze_portfolio
+from stock_data import HistoryCache, MetadataStore, YahooProvider
+from trend import fit_trends, forecast_trends, stack_series, walk_forward_backtest
+
+SUMMARY_FIELDS = [
+    'symbol', 'company_name', 'last_date', 'current_price', 'change',
+    'change_percent', 'volume', 'pred_price', 'pred_change',
+    'pred_change_percent', 'r2_score', 'confidence', 'model', 'error',
+]
+
+BACKTEST_FIELDS = [
+    'symbol', 'horizon', 'samples', 'mae', 'mape', 'hit_rate', 'error',
+]
+
+INDICATOR_FIELDS = ['symbol', 'last_date'] + INDICATOR_COLUMNS + ['error']
+
+DEFAULT_BACKTEST_WINDOW = 60
+
+
+def prediction_dates(df, days):
+    last_date = df.index[-1]
+    return pd.date_range(start=last_date + timedelta(days=1),
+                         periods=days, freq='D')
+
+
+def predict_prices(df, days, model=DEFAULT_MODEL):
+    predictions, r2, model = fit_model(model, df['Close'].to_numpy(), days)
+    
+    return prediction_dates(df, days), predictions, r2, model
+
+
+def predict_many(frames, days, model=DEFAULT_MODEL):
+    if model != DEFAULT_MODEL:
+        return [predict_prices(df, days, model) for df in frames]
+    
+    # The linear trend is fitted for all frames in one vectorized pass.
+    slope, intercept, r2, n = fit_trends(
+        stack_series([df['Close'].to_numpy() for df in frames]))
+    predictions = forecast_trends(slope, intercept, n, days)
+    
+    return [(prediction_dates(df, days), predictions[i], r2[i], model)
+            for i, df in enumerate(frames)]
+
+
+def backtest(df, days, window=DEFAULT_BACKTEST_WINDOW):
+    closes = df['Close'].dropna().to_numpy()
+    metrics = walk_forward_backtest(closes, window, days)
+    return pd.DataFrame({name: values[0] for name, values in metrics.items()},
+                        index=pd.RangeIndex(1, days + 1, name='horizon'))
+
+
+def backtest_records(symbol, metrics, row):
+    records = []
+    for h in range(metrics['samples'].shape[1]):
+        samples = int(metrics['samples'][row, h])
+        records.append({
+            'symbol': symbol,
+            'horizon': h + 1,
+            'samples': samples,
+            'mae': round(float(metrics['mae'][row, h]), 4) if samples else '',
+            'mape': round(float(metrics['mape'][row, h]), 4) if samples else '',
+            'hit_rate': round(float(metrics['hit_rate'][row, h]), 4) if samples else '',
+            'error': '' if samples else "Not enough history for the backtest window",
+        })
+    return records
+
+
+def confidence_label(r2_score):
+    return 'High' if r2_score > 0.8 else 'Medium' if r2_score > 0.5 else 'Low'
+
+
+def summarize(df, pred_days, prediction=None):
+    if prediction is None:
+        prediction = predict_prices(df, pred_days)
+    pred_dates, predictions, r2_score, model = prediction
+    
+    current_price = df['Close'].iloc[-1]
+    prev_price = df['Close'].iloc[-2]
+    
+    return {
+        'pred_dates': pred_dates,
+        'predictions': predictions,
+        'r2_score': r2_score,
+        'model': model,
+        'current_price': current_price,
+        'change': current_price - prev_price,
+        'volume': df['Volume'].iloc[-1],
+        'pred_price': predictions[-1],
+        'pred_change': predictions[-1] - current_price,
+    }
+
+
+def summary_record(symbol, company_name, df, pred_days, prediction=None):
+    summary = summarize(df, pred_days, prediction)
+    current_price = float(summary['current_price'])
+    return {
+        'symbol': symbol,
+        'company_name': company_name,
+        'last_date': df.index[-1].strftime('%Y-%m-%d'),
+        'current_price': round(current_price, 4),
+        'change': round(float(summary['change']), 4),
+        'change_percent': round(float(summary['change']) / current_price * 100, 4),
+        'volume': int(summary['volume']),
+        'pred_price': round(float(summary['pred_price']), 4),
+        'pred_change': round(float(summary['pred_change']), 4),
+        'pred_change_percent': round(float(summary['pred_change']) / current_price * 100, 4),
+        'r2_score': round(float(summary['r2_score']), 6),
+        'confidence': confidence_label(summary['r2_score']),
+        'model': summary['model'],
+        'error': '',
+    }
+
+
+def _error_record(symbol, company_name, error):
+    return {'symbol': symbol, 'company_name': company_name, 'error': str(error)}
+
+
+def _analyze_chunk(jobs):
+    records = [None] * len(jobs)
+    fit_jobs = []
+    for i, (symbol, company_name, df, pred_days, model) in enumerate(jobs):
+        if df['Close'].count() < 2:
+            records[i] = _error_record(symbol, company_name,
+                                       "No data found for this symbol")
+        else:
+            fit_jobs.append(i)
+    
+    if fit_jobs:
+        pred_days, model = jobs[fit_jobs[0]][3:]
+        predictions = predict_many([jobs[i][2] for i in fit_jobs], pred_days, model)
+        for i, prediction in zip(fit_jobs, predictions):
+            symbol, company_name, df, pred_days, model = jobs[i]
+            try:
+                records[i] = summary_record(symbol, company_name, df,
+                                            pred_days, prediction)
+            except Exception as e:
+                records[i] = _error_record(symbol, company_name, e)
+    return records
+
+
+def _backtest_chunk(jobs):
+    _, _, window, days = jobs[0]
+    metrics = walk_forward_backtest(
+        stack_series([df['Close'].dropna().to_numpy() for _, df, _, _ in jobs]),
+        window, days)
+    
+    records = []
+    for row, (symbol, _, _, _) in enumerate(jobs):
+        records.extend(backtest_records(symbol, metrics, row))
+    return records
+
+
+def _indicator_chunk(jobs):
+    records = []
+    frames = compute_many([df for _, df in jobs])
+    for (symbol, df), values in zip(jobs, frames):
+        if df.empty:
+            records.append({'symbol': symbol, 'error': "No data found for this symbol"})
+            continue
+        last = values.iloc[-1]
+        record = {'symbol': symbol, 'last_date': df.index[-1].strftime('%Y-%m-%d')}
+        for name in INDICATOR_COLUMNS:
+            record[name] = '' if pd.isna(last[name]) else round(float(last[name]), 4)
+        record['error'] = ''
+        records.append(record)
+    return records
+
+
+def timed_results(results, timer, stage):
+    # Time only the wait for each worker chunk, not the consumer's handling of it.
+    while True:
+        start = time.perf_counter()
+        try:
+            records = next(results)
+        except StopIteration:
+            return
+        finally:
+            timer.add(stage, (time.perf_counter() - start) * 1000)
+        yield from records
+
+
+class ForecastCache:
+    # Small LRU of fitted forecasts. Values are computed outside the lock; two
+    # threads asking for the same missing key may both fit it.
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key, compute):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+
+class AnalysisEngine:
+    def __init__(self, history_cache=None, metadata=None, provider=None):
+        provider = provider or YahooProvider()
+        self.history_cache = history_cache or HistoryCache(provider)
+        self.metadata = metadata or MetadataStore(provider)
+        self.forecasts = ForecastCache()
+    
+    def predict(self, symbol, period, df, days, model=DEFAULT_MODEL):
+        # Keyed on the newest bar (and its close, which changes while today's
+        # bar is still forming), so re-running a symbol or switching back to a
+        # model or horizon already used doesn't refit unchanged history.
+        key = (symbol, df.index[-1], float(df['Close'].iloc[-1]), period, model, days)
+        return self.forecasts.get(key, lambda: predict_prices(df, days, model))
+    
+    def fetch(self, symbol, period, on_name_update=None, timer=None):
+        timer = timer or StageTimer('fetch')
+        try:
+            with timer.stage('history'):
+                df = self.history_cache.get(symbol, period)
+            
+            if df.empty:
+                raise ValueError("No data found for this symbol")
+            
+            with timer.stage('metadata'):
+                company_name = self.metadata.get_name(symbol, on_update=on_name_update)
+            
+            return df, company_name
+        except Exception as e:
+            raise Exception(f"Error fetching data: {str(e)}")
+    
+    def analyze(self, symbol, period, pred_days, model=DEFAULT_MODEL, on_name_update=None):
+        df, company_name = self.fetch(symbol, period, on_name_update=on_name_update)
+        prediction = self.predict(symbol, period, df, pred_days, model)
+        return summary_record(symbol, company_name, df, pred_days, prediction)
+    
+    def run_batch(self, symbols, period, pred_days, workers=None, chunk_size=64,
+                  timer=None, model=DEFAULT_MODEL):
+        timer = timer or StageTimer('batch')
+        with timer.stage('history'):
+            frames = self.history_cache.get_many(symbols, period)
+        # Company names are looked up while the fits run, and filled in as
+        # records come back.
+        names = self.metadata.get_names(list(frames))
+        jobs = [(symbol, symbol, df[['Close', 'Volume']], pred_days, model)
+                for symbol, df in frames.items()]
+        chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+        
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for record in timed_results(pool.map(_analyze_chunk, chunks), timer, 'fit'):
+                with timer.stage('metadata'):
+                    record['company_name'] = names[record['symbol']].result()
+                yield record
+    
+    def run_backtest(self, symbols, period, days, window=DEFAULT_BACKTEST_WINDOW,
+                     workers=None, chunk_size=64, timer=None):
+        timer = timer or StageTimer('backtest')
+        with timer.stage('history'):
+            frames = self.history_cache.get_many(symbols, period)
+        jobs = [(symbol, df[['Close']], window, days)
+                for symbol, df in frames.items()]
+        chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+        
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            yield from timed_results(pool.map(_backtest_chunk, chunks), timer, 'fit')
+    
+    def run_indicators(self, symbols, period, workers=None, chunk_size=64, timer=None):
+        timer = timer or StageTimer('indicators')
+        with timer.stage('history'):
+            frames = self.history_cache.get_many(symbols, period)
+        jobs = [(symbol, df.dropna()) for symbol, df in frames.items()]
+        chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+        
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            yield from timed_results(pool.map(_indicator_chunk, chunks), timer,
+                                      'indicators')
+    
+    def run_portfolio(self, symbols, period, benchmark=DEFAULT_BENCHMARK,
+                      window=DEFAULT_BETA_WINDOW, timer=None):
+        timer = timer or StageTimer('portfolio')
+        with timer.stage('history'):
+            frames = self.history_cache.get_many(list(symbols) + [benchmark], period)
+        with timer.stage('analytics'):
+            return analyze_portfolio(frames, benchmark, window)
@@ -0,0 +1,184 @@
+import numpy as np
+import pandas as pd
+
+from trend import stack_series
+
+DEFAULT_PARAMS = {
+    'sma': 20,
+    'ema': 20,
+    'rsi': 14,
+    'macd': (12, 26, 9),
+    'bollinger': (20, 2.0),
+    'vwap': 20,
+}
+
+INDICATOR_COLUMNS = [
+    'sma', 'ema', 'rsi', 'macd', 'macd_signal', 'macd_hist',
+    'bb_mid', 'bb_upper', 'bb_lower', 'vwap',
+]
+
+BAR_INPUTS = ['High', 'Low', 'Close', 'Volume']
+
+
+def _rows(values):
+    return np.atleast_2d(np.asarray(values, dtype=float))
+
+
+def _time_major(values):
+    # pandas' rolling and ewm kernels run down columns, so tickers become columns.
+    return pd.DataFrame(values.T)
+
+
+def rolling_mean(values, window):
+    return _time_major(_rows(values)).rolling(window).mean().to_numpy().T
+
+
+def rolling_sum(values, window):
+    return _time_major(_rows(values)).rolling(window).sum().to_numpy().T
+
+
+def rolling_std(values, window):
+    return _time_major(_rows(values)).rolling(window).std(ddof=0).to_numpy().T
+
+
+def ewm(values, alpha, seed=None):
+    # y[t] = alpha * x[t] + (1 - alpha) * y[t-1], starting from the first valid
+    # value. `seed` is y[-1] carried over from earlier bars; continuing from it
+    # gives the same values as recomputing over the whole history.
+    values = _rows(values)
+    if seed is None:
+        smoothed = _time_major(values).ewm(alpha=alpha, adjust=False, ignore_na=True)
+        return smoothed.mean().to_numpy().T
+    
+    out = np.empty_like(values)
+    y = np.asarray(seed, dtype=float).copy()
+    for t in range(values.shape[1]):
+        x = values[:, t]
+        y = np.where(np.isnan(y), x, np.where(np.isnan(x), y, alpha * x + (1 - alpha) * y))
+        out[:, t] = y
+    return out
+
+
+def _compute(high, low, close, volume, params, state):
+    # Windowed indicators are recomputed over the carried tail plus the new
+    # bars; recursive ones continue from their carried last values.
+    arrays = [_rows(a) for a in (high, low, close, volume)]
+    seeds = state or {}
+    tail = 0
+    if state is not None:
+        tail = state['tail'][0].shape[1]
+        arrays = [np.column_stack([old, new]) for old, new in zip(state['tail'], arrays)]
+    high, low, close, volume = arrays
+    new_close = close[:, tail:]
+    
+    sma_window = params['sma']
+    bb_window, bb_width = params['bollinger']
+    vwap_window = params['vwap']
+    fast, slow, signal = params['macd']
+    rsi_window = params['rsi']
+    
+    out = {}
+    out['sma'] = rolling_mean(close, sma_window)[:, tail:]
+    mid = out['sma'] if bb_window == sma_window else rolling_mean(close, bb_window)[:, tail:]
+    std = rolling_std(close, bb_window)[:, tail:]
+    out['bb_mid'] = mid
+    out['bb_upper'] = mid + bb_width * std
+    out['bb_lower'] = mid - bb_width * std
+    
+    typical = (high + low + close) / 3
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out['vwap'] = (rolling_sum(typical * volume, vwap_window)[:, tail:]
+                       / rolling_sum(volume, vwap_window)[:, tail:])
+    
+    series = {}
+    series['ema'] = ewm(new_close, 2 / (params['ema'] + 1), seeds.get('ema'))
+    series['macd_fast'] = ewm(new_close, 2 / (fast + 1), seeds.get('macd_fast'))
+    series['macd_slow'] = ewm(new_close, 2 / (slow + 1), seeds.get('macd_slow'))
+    macd = series['macd_fast'] - series['macd_slow']
+    series['macd_signal'] = ewm(macd, 2 / (signal + 1), seeds.get('macd_signal'))
+    out['ema'] = series['ema']
+    out['macd'] = macd
+    out['macd_signal'] = series['macd_signal']
+    out['macd_hist'] = macd - series['macd_signal']
+    
+    # Wilder's RSI: gains and losses smoothed with alpha = 1 / window, and
+    # left blank until a full window of changes has been seen.
+    delta = np.diff(close[:, max(tail - 1, 0):], axis=1)
+    if not tail:
+        delta = np.column_stack([np.full(len(delta), np.nan), delta])
+    series['rsi_gain'] = ewm(np.clip(delta, 0, None), 1 / rsi_window, seeds.get('rsi_gain'))
+    series['rsi_loss'] = ewm(np.clip(-delta, 0, None), 1 / rsi_window, seeds.get('rsi_loss'))
+    gain, loss = series['rsi_gain'], series['rsi_loss']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rsi = np.where(loss > 0, 100 - 100 / (1 + gain / loss),
+                       np.where(gain > 0, 100.0, 50.0))
+    rsi[np.isnan(gain) | np.isnan(loss)] = np.nan
+    seen = seeds.get('bars', 0)
+    rsi[:, seen + np.arange(new_close.shape[1]) < rsi_window] = np.nan
+    out['rsi'] = rsi
+    
+    keep = max(sma_window, bb_window, vwap_window, 2) - 1
+    return out, arrays, series, tail, keep, seen
+
+
+def _carry(arrays, series, tail, keep, seen, end):
+    # State after the first `end` new bars.
+    stop = tail + end
+    state = {name: values[:, end - 1].copy() for name, values in series.items()}
+    state['tail'] = [a[:, max(stop - keep, 0):stop].copy() for a in arrays]
+    state['bars'] = seen + end
+    return state
+
+
+class IndicatorPipeline:
+    # Computes INDICATOR_COLUMNS for rows of bars (one row per ticker) and keeps
+    # each indicator's state, so later bars are added without revisiting the
+    # history. revise_last() replaces the newest bar, e.g. a still-forming
+    # intraday bar, by re-appending it on top of the state before it.
+    def __init__(self, params=None):
+        self.params = dict(DEFAULT_PARAMS, **(params or {}))
+        self.state = None
+        self._previous = None
+    
+    def compute(self, high, low, close, volume):
+        self.state = None
+        self._previous = None
+        return self.append(high, low, close, volume)
+    
+    def append(self, high, low, close, volume):
+        bars = _rows(close).shape[1]
+        if bars == 0:
+            return {name: _rows(close).copy() for name in INDICATOR_COLUMNS}
+        
+        out, arrays, series, tail, keep, seen = _compute(high, low, close, volume,
+                                                         self.params, self.state)
+        previous = self.state
+        if bars > 1:
+            previous = _carry(arrays, series, tail, keep, seen, bars - 1)
+        self._previous = previous
+        self.state = _carry(arrays, series, tail, keep, seen, bars)
+        return out
+    
+    def revise_last(self, high, low, close, volume):
+        self.state = self._previous
+        return self.append(high, low, close, volume)
+
+
+def frame_inputs(df):
+    return [df[column].to_numpy(dtype=float) for column in BAR_INPUTS]
+
+
+def compute_indicators(df, params=None):
+    out = IndicatorPipeline(params).compute(*frame_inputs(df))
+    return pd.DataFrame({name: out[name][0] for name in INDICATOR_COLUMNS}, index=df.index)
+
+
+def compute_many(frames, params=None):
+    # One pass over all frames at once; rows shorter than the longest frame are
+    # NaN-padded at the end, so each frame's values are its own leading slice.
+    inputs = [stack_series([df[column].to_numpy(dtype=float) for df in frames])
+              for column in BAR_INPUTS]
+    out = IndicatorPipeline(params).compute(*inputs)
+    return [pd.DataFrame({name: out[name][i, :len(df)] for name in INDICATOR_COLUMNS},
+                         index=df.index)
+            for i, df in enumerate(frames)]
@@ -0,0 +1,127 @@
+import cProfile
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger('stock_analysis.timing')
+
+LOG_ENV = 'STOCK_ANALYSIS_TIMING_LOG'
+PROFILE_ENV = 'STOCK_ANALYSIS_PROFILE'
+
+# Python 3.12+ allows one active cProfile per process, so tasks that overlap
+# one being profiled run unprofiled.
+_profile_lock = threading.Lock()
+
+
+class StageTimer:
+    def __init__(self, name, **context):
+        self.name = name
+        self.context = context
+        self.stages = {}
+        self.started = time.time()
+    
+    @contextmanager
+    def stage(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, (time.perf_counter() - start) * 1000)
+    
+    def add(self, stage, ms):
+        self.stages[stage] = self.stages.get(stage, 0.0) + ms
+    
+    def total(self):
+        return sum(self.stages.values())
+    
+    def summary(self):
+        parts = [f"{stage} {ms:.0f} ms" for stage, ms in self.stages.items()]
+        return " | ".join(parts + [f"total {self.total():.0f} ms"])
+    
+    def to_dict(self):
+        return {
+            'event': self.name,
+            'timestamp': self.started,
+            **self.context,
+            'stages_ms': {stage: round(ms, 3) for stage, ms in self.stages.items()},
+            'total_ms': round(self.total(), 3),
+        }
+    
+    def log(self):
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(self.to_dict()))
+
+
+class DrawTimer:
+    # Wraps canvas.draw so the real (possibly idle-deferred) draws are timed.
+    def __init__(self, canvas, on_draw):
+        self._draw = canvas.draw
+        self.on_draw = on_draw
+        canvas.draw = self
+    
+    def __call__(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._draw(*args, **kwargs)
+        finally:
+            self.on_draw((time.perf_counter() - start) * 1000)
+
+
+def configure_timing_log(target=None):
+    target = target or os.environ.get(LOG_ENV)
+    if not target:
+        return
+    if target == '-':
+        handler = logging.StreamHandler(sys.stderr)
+    else:
+        handler = logging.FileHandler(target)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+@contextmanager
+def profiled(name, directory=None):
+    directory = directory or os.environ.get(PROFILE_ENV)
+    if not directory or not _profile_lock.acquire(blocking=False):
+        yield
+        return
+    
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        # Another profiler, not one of ours, is already active.
+        _profile_lock.release()
+        yield
+        return
+    try:
+        yield
+    finally:
+        profile.disable()
+        _profile_lock.release()
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        profile.dump_stats(os.path.join(directory, f"{name}-{stamp}-{os.getpid()}.prof"))
+
+
+def import_cost(module):
+    # Cumulative import time in a fresh interpreter, so modules that are already
+    # loaded in this process (or shared dependencies) don't hide the real cost.
+    # Run from the repo directory so its own modules import from anywhere.
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+                            capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        raise ImportError(result.stderr.strip().splitlines()[-1])
+    for line in reversed(result.stderr.splitlines()):
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1000
+    raise ImportError(f"no import time reported for {module}")
@@ -0,0 +1,345 @@
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from indicators import BAR_INPUTS, INDICATOR_COLUMNS, IndicatorPipeline
+
+BAR_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+class RingBuffer:
+    # Fixed-capacity bar store. Appends overwrite the oldest bar in place, so
+    # memory stays constant no matter how long the session runs.
+    def __init__(self, capacity, columns=BAR_FIELDS):
+        self.capacity = capacity
+        self.columns = columns
+        self.times = np.zeros(capacity, dtype='datetime64[ns]')
+        self.values = np.zeros((capacity, len(columns)))
+        self.start = 0
+        self.size = 0
+    
+    def __len__(self):
+        return self.size
+    
+    def _slot(self, i):
+        return (self.start + i) % self.capacity
+    
+    def append(self, timestamp, bar):
+        if self.size < self.capacity:
+            slot = self._slot(self.size)
+            self.size += 1
+            evicted = None
+        else:
+            slot = self.start
+            evicted = self.values[slot].copy()
+            self.start = (self.start + 1) % self.capacity
+        self.times[slot] = timestamp
+        self.values[slot] = bar
+        return evicted
+    
+    def replace_last(self, bar):
+        slot = self._slot(self.size - 1)
+        previous = self.values[slot].copy()
+        self.values[slot] = bar
+        return previous
+    
+    def last_time(self):
+        if not self.size:
+            return None
+        return self.times[self._slot(self.size - 1)]
+    
+    def last(self, back=0):
+        return self.values[self._slot(self.size - 1 - back)]
+    
+    def view(self):
+        end = self.start + self.size
+        if end <= self.capacity:
+            return self.times[self.start:end], self.values[self.start:end]
+        wrap = end - self.capacity
+        return (np.concatenate([self.times[self.start:], self.times[:wrap]]),
+                np.concatenate([self.values[self.start:], self.values[:wrap]]))
+    
+    def to_frame(self):
+        times, values = self.view()
+        return pd.DataFrame(values, columns=self.columns,
+                            index=pd.DatetimeIndex(times, name='Datetime'))
+
+
+class RunningTrend:
+    # Sufficient statistics of the least squares line over the bars currently
+    # in the window, with x = 0..n-1. Appending, evicting the oldest bar or
+    # revising the newest one are all O(1). Prices are stored relative to the
+    # first price seen to keep the sums well conditioned, and the sums are
+    # rebuilt from the buffer every `capacity` updates to stop drift.
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.offset = None
+        self.updates = 0
+        self.reset()
+    
+    def reset(self):
+        self.n = 0
+        self.sy = 0.0
+        self.sxy = 0.0
+        self.syy = 0.0
+    
+    def push(self, y, evicted=None):
+        if self.offset is None:
+            self.offset = y
+        y -= self.offset
+        if evicted is not None:
+            y_old = evicted - self.offset
+            self.sxy -= self.sy - y_old
+            self.sy -= y_old
+            self.syy -= y_old * y_old
+            self.n -= 1
+        self.sxy += self.n * y
+        self.sy += y
+        self.syy += y * y
+        self.n += 1
+        self.updates += 1
+    
+    def revise_last(self, y_old, y_new):
+        y_old -= self.offset
+        y_new -= self.offset
+        self.sxy += (self.n - 1) * (y_new - y_old)
+        self.sy += y_new - y_old
+        self.syy += y_new * y_new - y_old * y_old
+        self.updates += 1
+    
+    def rebuild(self, closes):
+        y = np.asarray(closes, dtype=float) - self.offset
+        self.n = len(y)
+        self.sy = y.sum()
+        self.sxy = (np.arange(self.n) * y).sum()
+        self.syy = (y * y).sum()
+        self.updates = 0
+    
+    def needs_rebuild(self):
+        return self.updates >= self.capacity
+    
+    def fit(self):
+        n = self.n
+        if n == 0:
+            return 0.0, 0.0, 0.0
+        if n == 1:
+            return 0.0, self.sy + self.offset, 1.0
+        x_mean = (n - 1) / 2
+        sxx = n * (n * n - 1) / 12
+        sxy = self.sxy - x_mean * self.sy
+        syy = self.syy - self.sy * self.sy / n
+        slope = sxy / sxx
+        intercept = self.sy / n - slope * x_mean + self.offset
+        r2 = sxy * sxy / (sxx * syy) if syy > 0 else 1.0
+        return slope, intercept, r2
+    
+    def forecast(self, days):
+        slope, intercept, _ = self.fit()
+        return intercept + slope * (self.n + np.arange(days))
+
+
+class BarFeed:
+    def poll(self):
+        raise NotImplementedError
+
+
+class YahooIntradayFeed(BarFeed):
+    def __init__(self, symbol, interval='1m', period='1d'):
+        self.symbol = symbol
+        self.interval = interval
+        self.period = period
+    
+    def poll(self):
+        import yfinance as yf
+        from stock_data import shared_session
+        ticker = yf.Ticker(self.symbol, session=shared_session())
+        df = ticker.history(period=self.period, interval=self.interval)
+        return df.reindex(columns=BAR_FIELDS)
+
+
+class ReplayFeed(BarFeed):
+    # Plays back a recorded bar file. `speed` is how many seconds of market
+    # time pass per wall-clock second; 0 releases every bar on the first poll.
+    def __init__(self, path, speed=1.0, clock=time.monotonic):
+        self.bars = load_bars(path)
+        self.speed = speed
+        self.clock = clock
+        self.started = None
+        self.position = 0
+    
+    def poll(self):
+        if self.started is None:
+            self.started = self.clock()
+        if self.speed <= 0:
+            end = len(self.bars)
+        else:
+            elapsed = pd.Timedelta(seconds=(self.clock() - self.started) * self.speed)
+            end = np.searchsorted(self.bars.index, self.bars.index[0] + elapsed,
+                                  side='right')
+        bars = self.bars.iloc[self.position:end]
+        self.position = max(self.position, end)
+        return bars
+    
+    def finished(self):
+        return self.position >= len(self.bars)
+
+
+def load_bars(path):
+    if path.endswith('.parquet'):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path, index_col=0)
+        df.index = pd.to_datetime(df.index, utc=True)
+    return df.reindex(columns=BAR_FIELDS).sort_index()
+
+
+def save_bars(df, path):
+    df = df.reindex(columns=BAR_FIELDS)
+    if path.endswith('.parquet'):
+        df.to_parquet(path)
+    else:
+        df.to_csv(path)
+
+
+class LiveSession:
+    def __init__(self, feed, capacity=390, pred_days=30):
+        self.feed = feed
+        self.pred_days = pred_days
+        self.buffer = RingBuffer(capacity)
+        self.trend = RunningTrend(capacity)
+        self.indicators = IndicatorPipeline()
+        self.indicator_buffer = RingBuffer(capacity, INDICATOR_COLUMNS)
+    
+    def poll(self):
+        bars = self.feed.poll()
+        return self.ingest(bars)
+    
+    def ingest(self, bars):
+        index = pd.DatetimeIndex(bars.index)
+        if index.tz is not None:
+            index = index.tz_convert(None)
+        
+        changed = False
+        appended = []
+        for timestamp, row in zip(index.to_numpy('datetime64[ns]'),
+                                  bars.to_numpy(dtype=float)):
+            if np.isnan(row[3]):
+                continue
+            last_time = self.buffer.last_time()
+            if last_time is not None and timestamp < last_time:
+                continue
+            if last_time is not None and timestamp == last_time:
+                self._update_indicators(appended)
+                appended = []
+                previous = self.buffer.replace_last(row)
+                if previous[3] != row[3]:
+                    self.trend.revise_last(previous[3], row[3])
+                self._update_indicators([(timestamp, row)], revise=True)
+            else:
+                evicted = self.buffer.append(timestamp, row)
+                self.trend.push(row[3], None if evicted is None else evicted[3])
+                appended.append((timestamp, row))
+            changed = True
+        self._update_indicators(appended)
+        
+        if self.trend.needs_rebuild():
+            self.trend.rebuild(self.buffer.view()[1][:, 3])
+        return changed
+    
+    def _update_indicators(self, bars, revise=False):
+        # New bars are fed to the indicator pipeline in one batch, so each
+        # indicator only advances its carried state over those bars.
+        if not bars:
+            return
+        values = np.array([row for _, row in bars])
+        inputs = [values[:, BAR_FIELDS.index(field)] for field in BAR_INPUTS]
+        if revise:
+            out = self.indicators.revise_last(*inputs)
+        else:
+            out = self.indicators.append(*inputs)
+        rows = np.column_stack([out[name][0] for name in INDICATOR_COLUMNS])
+        for (timestamp, _), row in zip(bars, rows):
+            if revise:
+                self.indicator_buffer.replace_last(row)
+            else:
+                self.indicator_buffer.append(timestamp, row)
+    
+    def bar_interval(self):
+        times = self.buffer.view()[0]
+        if len(times) < 2:
+            return pd.Timedelta(minutes=1)
+        return pd.Timedelta(np.median(np.diff(times)))
+    
+    def forecast(self):
+        last_time = pd.Timestamp(self.buffer.last_time())
+        step = self.bar_interval()
+        pred_dates = pd.DatetimeIndex([last_time + step * (i + 1)
+                                       for i in range(self.pred_days)])
+        return pred_dates, self.trend.forecast(self.pred_days)
+    
+    def snapshot(self):
+        if len(self.buffer) < 2:
+            return None
+        current = self.buffer.last()
+        previous = self.buffer.last(1)
+        slope, intercept, r2 = self.trend.fit()
+        pred_price = intercept + slope * (self.trend.n - 1 + self.pred_days)
+        return {
+            'time': str(self.buffer.last_time()),
+            'current_price': float(current[3]),
+            'change': float(current[3] - previous[3]),
+            'volume': float(current[4]),
+            'pred_price': float(pred_price),
+            'pred_change': float(pred_price - current[3]),
+            'r2_score': float(r2),
+            'bars': len(self.buffer),
+        }
+
+
+def live_main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Stream intraday bars and print the running trend")
+    parser.add_argument('symbol', nargs='?', help="ticker symbol to poll")
+    parser.add_argument('--replay', metavar='FILE', help="play back a recorded bar file")
+    parser.add_argument('--speed', type=float, default=60.0,
+                        help="replay speed in market seconds per second (0 = instant)")
+    parser.add_argument('--interval', default='1m')
+    parser.add_argument('--poll', type=float, default=30.0, help="seconds between polls")
+    parser.add_argument('--capacity', type=int, default=390)
+    parser.add_argument('-d', '--days', type=int, default=30,
+                        help="number of bars to predict ahead")
+    parser.add_argument('--record', metavar='FILE',
+                        help="save the bars seen to FILE on exit")
+    args = parser.parse_args(argv)
+    
+    if args.replay:
+        feed = ReplayFeed(args.replay, args.speed)
+    elif args.symbol:
+        feed = YahooIntradayFeed(args.symbol.upper(), args.interval)
+    else:
+        parser.error("give a symbol or --replay FILE")
+    
+    session = LiveSession(feed, args.capacity, args.days)
+    try:
+        while True:
+            if session.poll():
+                snapshot = session.snapshot()
+                if snapshot:
+                    print(json.dumps(snapshot), flush=True)
+            if isinstance(feed, ReplayFeed) and feed.finished():
+                break
+            time.sleep(args.poll if not args.replay else min(args.poll, 0.25))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if args.record:
+            save_bars(session.buffer.to_frame(), args.record)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(live_main())
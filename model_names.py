@@ -0,0 +1,7 @@
+# Forecast model names shared by the GUI, the command line and models.py.
+# Kept free of heavy imports so the window can use it before first paint.
+DEFAULT_MODEL = 'linear'
+AUTO_MODEL = 'auto'
+
+MODEL_NAMES = ['linear', 'polynomial', 'log-linear', 'smoothing', 'ar']
+MODEL_CHOICES = MODEL_NAMES + [AUTO_MODEL]
@@ -0,0 +1,151 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from model_names import AUTO_MODEL, DEFAULT_MODEL, MODEL_NAMES
+from trend import fit_trends, forecast_trends
+
+RIDGE_DEGREE = 2
+RIDGE_ALPHA = 1e-3
+SMOOTHING_ALPHA = 0.3
+SMOOTHING_BETA = 0.1
+AR_ORDER = 5
+
+# Every model takes the valid closes of one symbol and returns its in-sample
+# fitted values (NaN where it has none) and the next `days` forecasts.
+
+
+def linear(y, days):
+    slope, intercept, _, n = fit_trends(y)
+    fitted = intercept[0] + slope[0] * np.arange(len(y))
+    return fitted, forecast_trends(slope, intercept, n, days)[0]
+
+
+def polynomial(y, days, degree=RIDGE_DEGREE, alpha=RIDGE_ALPHA):
+    # Ridge regression on powers of the day index scaled to 0..1, so the
+    # penalty means the same thing for any history length.
+    n = len(y)
+    t = np.arange(n + days) / max(n - 1, 1)
+    x = np.vander(t, degree + 1, increasing=True)
+    penalty = alpha * n * np.eye(degree + 1)
+    penalty[0, 0] = 0.0
+    coef = np.linalg.solve(x[:n].T @ x[:n] + penalty, x[:n].T @ y)
+    values = x @ coef
+    return values[:n], values[n:]
+
+
+def log_linear(y, days):
+    if (y <= 0).any():
+        raise ValueError("log-linear model needs positive prices")
+    fitted, forecast = linear(np.log(y), days)
+    return np.exp(fitted), np.exp(forecast)
+
+
+def smoothing(y, days, alpha=SMOOTHING_ALPHA, beta=SMOOTHING_BETA):
+    # Holt's linear exponential smoothing; fitted values are the one-step-ahead
+    # forecasts.
+    fitted = np.full(len(y), np.nan)
+    level, trend = y[0], y[1] - y[0]
+    for t in range(1, len(y)):
+        fitted[t] = level + trend
+        new_level = alpha * y[t] + (1 - alpha) * (level + trend)
+        trend = beta * (new_level - level) + (1 - beta) * trend
+        level = new_level
+    return fitted, level + trend * np.arange(1, days + 1)
+
+
+def autoregressive(y, days, order=AR_ORDER):
+    # AR(order) on day-to-day changes, fitted by least squares and rolled
+    # forward one step at a time from the last price.
+    changes = np.diff(y)
+    lags = sliding_window_view(changes, order)[:-1]
+    x = np.column_stack([np.ones(len(lags)), lags])
+    coef = np.linalg.lstsq(x, changes[order:], rcond=None)[0]
+    
+    fitted = np.full(len(y), np.nan)
+    fitted[order + 1:] = y[order:-1] + x @ coef
+    recent = list(changes[-order:])
+    steps = []
+    for _ in range(days):
+        step = coef[0] + np.dot(coef[1:], recent[-order:])
+        steps.append(step)
+        recent.append(step)
+    return fitted, y[-1] + np.cumsum(steps)
+
+
+# name -> (fit function, minimum number of bars it needs), in the order of
+# model_names.MODEL_NAMES, which the GUI and command line offer.
+_FITS = {
+    'linear': (linear, 1),
+    'polynomial': (polynomial, RIDGE_DEGREE + 2),
+    'log-linear': (log_linear, 1),
+    'smoothing': (smoothing, 3),
+    'ar': (autoregressive, 2 * AR_ORDER + 2),
+}
+MODELS = {name: _FITS[name] for name in MODEL_NAMES}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _pool():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=len(MODELS),
+                                           thread_name_prefix='models')
+        return _executor
+
+
+def r_squared(y, fitted):
+    ok = ~np.isnan(fitted)
+    if not ok.any():
+        return 0.0
+    residual = ((y[ok] - fitted[ok]) ** 2).sum()
+    total = ((y[ok] - y[ok].mean()) ** 2).sum()
+    return 1.0 - residual / total if total > 0 else 1.0
+
+
+def _run(name, y, days):
+    fit, min_bars = MODELS[name]
+    if len(y) < min_bars:
+        raise ValueError(f"{name} model needs at least {min_bars} bars")
+    return fit(y, days)
+
+
+def holdout_error(name, y, holdout):
+    try:
+        forecast = _run(name, y[:-holdout], holdout)[1]
+    except (ValueError, np.linalg.LinAlgError):
+        return np.inf
+    error = np.abs(forecast - y[-holdout:]).mean()
+    return error if np.isfinite(error) else np.inf
+
+
+def select_model(y, days, candidates=None):
+    # Every candidate is fitted, in parallel, without the last `holdout` bars
+    # and scored by its mean absolute error on them.
+    candidates = list(candidates or MODELS)
+    holdout = max(1, min(days, len(y) // 5))
+    if len(y) <= holdout + 1:
+        return DEFAULT_MODEL
+    errors = list(_pool().map(lambda name: holdout_error(name, y, holdout), candidates))
+    best = int(np.argmin(errors))
+    return candidates[best] if np.isfinite(errors[best]) else DEFAULT_MODEL
+
+
+def fit_model(name, closes, days):
+    # Returns (forecast, r2, model used). Models that can't fit this history
+    # fall back to the linear trend.
+    y = np.asarray(closes, dtype=float)
+    y = y[~np.isnan(y)]
+    if name == AUTO_MODEL:
+        name = select_model(y, days)
+    try:
+        fitted, forecast = _run(name, y, days)
+    except (ValueError, np.linalg.LinAlgError):
+        name = DEFAULT_MODEL
+        fitted, forecast = linear(y, days)
+    return forecast, r_squared(y, fitted), name
@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+
+from trend import window_sums
+
+DEFAULT_BENCHMARK = 'SPY'
+DEFAULT_BETA_WINDOW = 60
+TRADING_DAYS = 252
+
+PORTFOLIO_FIELDS = [
+    'symbol', 'observations', 'mean_return', 'volatility', 'beta', 'rolling_beta',
+    'benchmark_corr', 'error',
+]
+
+
+def align_closes(frames):
+    # One row per symbol on the union of all trading dates. Bars are matched by
+    # their local date, so exchanges in different time zones line up.
+    series = {}
+    for symbol, df in frames.items():
+        index = df.index.tz_localize(None) if df.index.tz is not None else df.index
+        series[symbol] = pd.Series(df['Close'].to_numpy(dtype=float),
+                                   index=index.normalize())
+    closes = pd.concat(series, axis=1, sort=True).dropna(how='all')
+    return closes.index, closes.to_numpy().T
+
+
+def daily_returns(closes):
+    # Simple returns; NaN wherever either close is missing.
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return closes[:, 1:] / closes[:, :-1] - 1
+
+
+def pairwise_moments(returns):
+    # Covariance and correlation of every pair of rows over the days both have
+    # a return, as matrix products of the zero-filled returns and their masks.
+    # var[i, j] is the variance of row i over the days it shares with row j.
+    valid = ~np.isnan(returns)
+    mask = valid.astype(float)
+    x = np.where(valid, returns, 0.0)
+    
+    n = mask @ mask.T
+    sx = x @ mask.T
+    sxx = (x * x) @ mask.T
+    sxy = x @ x.T
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = (sxy - sx * sx.T / n) / (n - 1)
+        var = (sxx - sx * sx / n) / (n - 1)
+        corr = cov / np.sqrt(var * var.T)
+    enough = n >= 2
+    return (np.where(enough, cov, np.nan), np.where(enough, corr, np.nan),
+            np.where(enough, var, np.nan), n)
+
+
+def rolling_beta(returns, benchmark, window):
+    # Beta of every row against `benchmark` over each trailing window of
+    # `window` days, from cumulative sums so all windows come out of one pass.
+    # Column j covers returns j..j+window-1; windows with a missing return
+    # in either series are NaN.
+    joint = ~np.isnan(returns) & ~np.isnan(benchmark)
+    x = np.where(joint, returns, 0.0)
+    b = np.where(joint, benchmark, 0.0)
+    
+    count = window_sums(joint.astype(float), window)
+    sx = window_sums(x, window)
+    sb = window_sums(b, window)
+    sxb = window_sums(x * b, window)
+    sbb = window_sums(b * b, window)
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = sxb - sx * sb / window
+        var = sbb - sb * sb / window
+        beta = cov / var
+    return np.where((count == window) & (var > 0), beta, np.nan)
+
+
+def analyze_portfolio(frames, benchmark=DEFAULT_BENCHMARK, window=DEFAULT_BETA_WINDOW):
+    frames = {symbol: df for symbol, df in frames.items() if df['Close'].count() >= 2}
+    if benchmark not in frames:
+        raise ValueError(f"No data found for the benchmark {benchmark}")
+    symbols = list(frames)
+    dates, closes = align_closes(frames)
+    returns = daily_returns(closes)
+    if returns.shape[1] < window:
+        raise ValueError(f"A {window}-day beta window needs at least {window + 1} days "
+                         f"of history, got {closes.shape[1]}; use a longer period "
+                         f"or a shorter window")
+    cov, corr, var, n = pairwise_moments(returns)
+    row = symbols.index(benchmark)
+    # The benchmark's variance over the same days as each covariance, so a
+    # symbol with a shorter history isn't compared against the full one.
+    with np.errstate(invalid='ignore', divide='ignore'):
+        beta = cov[:, row] / var[row, :]
+    
+    return {
+        'symbols': symbols,
+        'benchmark': benchmark,
+        'dates': dates[1:],
+        'returns': returns,
+        'cov': cov,
+        'corr': corr,
+        'observations': np.diag(n).astype(int),
+        'beta': beta,
+        'rolling_beta': rolling_beta(returns, returns[row], window),
+        'window': window,
+    }
+
+
+def latest(values):
+    # Last non-NaN value of every row.
+    if values.shape[1] == 0:
+        return np.full(len(values), np.nan)
+    valid = ~np.isnan(values)
+    last = values.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+    return np.where(valid.any(axis=1), values[np.arange(len(values)), last], np.nan)
+
+
+def _value(x, digits=6):
+    return '' if np.isnan(x) else round(float(x), digits)
+
+
+def portfolio_records(result, symbols):
+    rows = {symbol: i for i, symbol in enumerate(result['symbols'])}
+    b = rows[result['benchmark']]
+    returns = result['returns']
+    with np.errstate(invalid='ignore'):
+        mean = np.nanmean(returns, axis=1) if returns.shape[1] else np.full(len(rows), np.nan)
+    volatility = np.sqrt(np.diag(result['cov']) * TRADING_DAYS)
+    rolling = latest(result['rolling_beta'])
+    
+    records = []
+    for symbol in symbols:
+        i = rows.get(symbol)
+        if i is None:
+            records.append({'symbol': symbol, 'error': "No data found for this symbol"})
+            continue
+        records.append({
+            'symbol': symbol,
+            'observations': int(result['observations'][i]),
+            'mean_return': _value(mean[i]),
+            'volatility': _value(volatility[i]),
+            'beta': _value(result['beta'][i]),
+            'rolling_beta': _value(rolling[i]),
+            'benchmark_corr': _value(result['corr'][i, b]),
+            'error': '',
+        })
+    return records
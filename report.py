@@ -0,0 +1,191 @@
+import html
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from engine import SUMMARY_FIELDS, predict_prices, summary_record, timed_results
+from instrumentation import StageTimer
+from models import DEFAULT_MODEL
+from stock_data import safe_symbol
+from theme import COLORS, DOWN_COLOR, PRED_DOWN_COLOR, PRED_UP_COLOR, UP_COLOR
+
+REPORT_FIELDS = SUMMARY_FIELDS[:-1] + ['report', 'error']
+REPORT_FORMATS = ['png', 'svg']
+
+FIGURE_SIZE = (14, 7)
+FIGURE_DPI = 100
+
+PAGE_STYLE = f"""
+body {{ background: {COLORS['bg_main']}; color: {COLORS['text_primary']};
+       font-family: Helvetica, Arial, sans-serif; margin: 30px; }}
+h1 {{ color: {COLORS['success']}; }}
+a {{ color: {COLORS['accent_secondary']}; }}
+.meta {{ color: {COLORS['text_secondary']}; }}
+.cards {{ display: grid; grid-template-columns: repeat(4, 1fr); gap: 15px; margin: 20px 0; }}
+.card {{ padding: 15px; text-align: center; font-weight: bold; }}
+.card .value {{ font-size: 1.4em; margin-top: 8px; }}
+img {{ max-width: 100%; }}
+table {{ border-collapse: collapse; width: 100%; }}
+th, td {{ padding: 6px 12px; text-align: right; border-bottom: 1px solid {COLORS['bg_secondary']}; }}
+th {{ background: {COLORS['card_bg']}; }}
+td.text {{ text-align: left; }}
+.up {{ color: {UP_COLOR}; }}
+.down {{ color: {DOWN_COLOR}; }}
+.error {{ color: {DOWN_COLOR}; text-align: left; }}
+"""
+
+_chart = None
+
+
+def _init_worker():
+    # One Agg figure per worker process, reused for every symbol it renders.
+    global _chart
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib import style
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from charts import PriceChart
+    
+    style.use('dark_background')
+    figure = Figure(figsize=FIGURE_SIZE, dpi=FIGURE_DPI, facecolor=COLORS['card_bg'])
+    canvas = FigureCanvasAgg(figure)
+    # savefig draws the figure; skip the extra draw PriceChart.update asks for.
+    canvas.draw_idle = lambda *args, **kwargs: None
+    _chart = PriceChart(figure, COLORS)
+
+
+def volume_text(volume):
+    if volume >= 1_000_000:
+        return f"{volume/1_000_000:.2f}M"
+    return f"{volume:,.0f}"
+
+
+def _page(title, body):
+    return (f"<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n"
+            f"<title>{html.escape(title)}</title>\n<style>{PAGE_STYLE}</style>\n"
+            f"</head>\n<body>\n{body}</body>\n</html>\n")
+
+
+def symbol_page(record, period, pred_days, images):
+    # The GUI's info cards, plus the fit quality, above the chart.
+    cards = [
+        ("Company", record['company_name'], COLORS['accent_secondary']),
+        ("Current Price", f"${record['current_price']:.2f}", COLORS['success']),
+        ("Change", f"{record['change']:+.2f} ({record['change_percent']:+.2f}%)",
+         UP_COLOR if record['change'] >= 0 else DOWN_COLOR),
+        ("Volume", volume_text(record['volume']), COLORS['accent_primary']),
+        ("Predicted Price", f"${record['pred_price']:.2f}", COLORS['button_gradient_1']),
+        ("Predicted Change",
+         f"{record['pred_change']:+.2f} ({record['pred_change_percent']:+.2f}%)",
+         PRED_UP_COLOR if record['pred_change'] >= 0 else PRED_DOWN_COLOR),
+        ("Model Accuracy (R²)", f"{record['r2_score']:.4f}", COLORS['card_bg']),
+        ("Confidence", record['confidence'], COLORS['card_bg']),
+    ]
+    body = [f"<h1>{html.escape(record['symbol'])}</h1>\n",
+            f"<p class=\"meta\">Last bar {record['last_date']}, {period} of history, "
+            f"{pred_days}-day forecast, {html.escape(record['model'])} model. "
+            f"<a href=\"index.html\">All symbols</a></p>\n",
+            "<div class=\"cards\">\n"]
+    for title, value, color in cards:
+        body.append(f"<div class=\"card\" style=\"background: {color}\">{html.escape(title)}"
+                    f"<div class=\"value\">{html.escape(str(value))}</div></div>\n")
+    body.append("</div>\n")
+    if images:
+        body.append(f"<img src=\"{html.escape(images[0])}\" alt=\"Price chart\">\n")
+    return _page(f"{record['symbol']} - Stock Analysis", body="".join(body))
+
+
+def index_page(records, period, pred_days):
+    columns = ["Symbol", "Company", "Price", "Change", "Predicted", "Predicted Change",
+               "R²", "Confidence", "Model"]
+    rows = []
+    for record in records:
+        symbol = html.escape(record['symbol'])
+        if record.get('error'):
+            rows.append(f"<tr><td class=\"text\">{symbol}</td>"
+                        f"<td class=\"error\" colspan=\"{len(columns) - 1}\">"
+                        f"{html.escape(record['error'])}</td></tr>\n")
+            continue
+        change = 'up' if record['change'] >= 0 else 'down'
+        pred_change = 'up' if record['pred_change'] >= 0 else 'down'
+        rows.append(
+            f"<tr><td class=\"text\"><a href=\"{html.escape(record['report'])}\">{symbol}</a></td>"
+            f"<td class=\"text\">{html.escape(record['company_name'])}</td>"
+            f"<td>${record['current_price']:.2f}</td>"
+            f"<td class=\"{change}\">{record['change_percent']:+.2f}%</td>"
+            f"<td>${record['pred_price']:.2f}</td>"
+            f"<td class=\"{pred_change}\">{record['pred_change_percent']:+.2f}%</td>"
+            f"<td>{record['r2_score']:.4f}</td>"
+            f"<td>{html.escape(record['confidence'])}</td>"
+            f"<td>{html.escape(record['model'])}</td></tr>\n")
+    header = "".join(f"<th>{html.escape(c)}</th>" for c in columns)
+    body = (f"<h1>Stock Analysis Report</h1>\n"
+            f"<p class=\"meta\">{len(records)} symbols, {period} of history, "
+            f"{pred_days}-day forecast</p>\n"
+            f"<table>\n<tr>{header}</tr>\n{''.join(rows)}</table>\n")
+    return _page("Stock Analysis Report", body)
+
+
+def _write(path, text):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def _render_chunk(jobs):
+    records = []
+    for symbol, company_name, df, period, pred_days, model, out_dir, formats in jobs:
+        if df['Close'].count() < 2:
+            records.append({'symbol': symbol, 'company_name': company_name,
+                            'error': "No data found for this symbol"})
+            continue
+        try:
+            prediction = predict_prices(df, pred_days, model)
+            record = summary_record(symbol, company_name, df, pred_days, prediction)
+            
+            name = safe_symbol(symbol)
+            images = [f"{name}.{fmt}" for fmt in formats]
+            _chart.update(df, prediction[0], prediction[1])
+            for image in images:
+                _chart.figure.savefig(os.path.join(out_dir, image),
+                                      facecolor=_chart.figure.get_facecolor())
+            record['report'] = f"{name}.html"
+            # The page is written by run_reports once the company name is in.
+            record['images'] = images
+        except Exception as e:
+            record = {'symbol': symbol, 'company_name': company_name, 'error': str(e)}
+        records.append(record)
+    return records
+
+
+def run_reports(engine, symbols, period, pred_days, out_dir, model=DEFAULT_MODEL,
+                formats=('png',), workers=None, chunk_size=8, timer=None):
+    # Renders a chart and an HTML page per symbol into out_dir, then an
+    # index.html linking them. Yields one record per symbol as it finishes.
+    timer = timer or StageTimer('report')
+    os.makedirs(out_dir, exist_ok=True)
+    with timer.stage('history'):
+        frames = engine.history_cache.get_many(symbols, period)
+    # Company names are looked up while the charts render.
+    names = engine.metadata.get_names(list(frames))
+    jobs = [(symbol, symbol, df[['Close', 'Volume']], period, pred_days, model,
+             out_dir, list(formats))
+            for symbol, df in frames.items()]
+    chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+    
+    records = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        for record in timed_results(pool.map(_render_chunk, chunks), timer, 'render'):
+            with timer.stage('metadata'):
+                record['company_name'] = names[record['symbol']].result()
+            images = record.pop('images', None)
+            if images is not None:
+                with timer.stage('pages'):
+                    _write(os.path.join(out_dir, record['report']),
+                           symbol_page(record, period, pred_days, images))
+            records.append(record)
+            yield record
+    
+    with timer.stage('index'):
+        _write(os.path.join(out_dir, 'index.html'), index_page(records, period, pred_days))
@@ -0,0 +1,501 @@
+import importlib.util
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import ExitStack
+
+import numpy as np
+import pandas as pd
+
+from columnar import ColumnarStore
+
+HAS_PARQUET = importlib.util.find_spec('pyarrow') is not None
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    'STOCK_ANALYSIS_CACHE',
+    os.path.join(os.path.expanduser('~'), '.stock_analysis'))
+
+# 'columnar' keeps history in the memory-mapped ColumnarStore instead of one
+# file per symbol.
+STORAGE_ENV = 'STOCK_ANALYSIS_STORAGE'
+
+PERIOD_OFFSETS = {
+    '1mo': pd.DateOffset(months=1),
+    '3mo': pd.DateOffset(months=3),
+    '6mo': pd.DateOffset(months=6),
+    '1y': pd.DateOffset(years=1),
+    '2y': pd.DateOffset(years=2),
+    '5y': pd.DateOffset(years=5),
+}
+
+PERIODS = list(PERIOD_OFFSETS)
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+ACTION_COLUMNS = ['Stock Splits', 'Dividends']
+FAILED_NAME_TTL = 3600
+ADJUSTMENT_RTOL = 1e-4
+
+
+def period_rank(period):
+    return PERIODS.index(period)
+
+
+def period_start(period, tz=None):
+    now = pd.Timestamp.now(tz=tz).normalize()
+    return now - PERIOD_OFFSETS[period]
+
+
+def normalize_history(df):
+    return df.reindex(columns=OHLCV_COLUMNS)
+
+
+def readjusted(df, delta):
+    # Yahoo prices are split and dividend adjusted, so a split or dividend
+    # after the cached bars changes all of them. It shows up in the action
+    # columns of the delta (Ticker.history has them, yf.download doesn't) or as
+    # a different close on the last completed cached bar, which deltas repeat.
+    if delta is None or delta.empty or df.empty:
+        return False
+    new = delta[delta.index > df.index[-1]]
+    for column in ACTION_COLUMNS:
+        if column in new.columns and (new[column].fillna(0) != 0).any():
+            return True
+    if len(df) < 2 or np.isnan(df['Close'].iloc[-2]):
+        return False
+    overlap = delta['Close'][delta.index == df.index[-2]].dropna()
+    return not overlap.empty and not np.isclose(overlap.iloc[0], df['Close'].iloc[-2],
+                                                rtol=ADJUSTMENT_RTOL)
+
+
+def delta_start(df):
+    # Deltas start one bar before the last, which may still have been in progress.
+    return df.index[max(len(df) - 2, 0)]
+
+
+def safe_symbol(symbol):
+    return re.sub(r'[^A-Za-z0-9._^-]', '_', symbol.upper())
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def shared_session():
+    # One pooled HTTP session for every Yahoo request in the process, so
+    # connections and cookies are reused instead of renegotiated per ticker.
+    global _session
+    with _session_lock:
+        if _session is None:
+            try:
+                from curl_cffi import requests as curl_requests
+                _session = curl_requests.Session(impersonate='chrome')
+            except ImportError:
+                import requests
+                from requests.adapters import HTTPAdapter
+                _session = requests.Session()
+                _session.mount('https://', HTTPAdapter(pool_connections=8, pool_maxsize=32))
+        return _session
+
+
+class DataProvider:
+    def history(self, symbol, period=None, start=None):
+        raise NotImplementedError
+    
+    def history_many(self, symbols, period=None, start=None):
+        return {symbol: self.history(symbol, period=period, start=start)
+                for symbol in symbols}
+    
+    def company_name(self, symbol):
+        return symbol
+
+
+class YahooProvider(DataProvider):
+    def __init__(self, chunk_size=200, session=None):
+        self.chunk_size = chunk_size
+        self._session = session
+    
+    @property
+    def session(self):
+        if self._session is None:
+            self._session = shared_session()
+        return self._session
+    
+    def history(self, symbol, period=None, start=None):
+        import yfinance as yf
+        ticker = yf.Ticker(symbol, session=self.session)
+        if start is not None:
+            return ticker.history(start=start)
+        return ticker.history(period=period)
+    
+    def history_many(self, symbols, period=None, start=None):
+        import yfinance as yf
+        frames = {}
+        for i in range(0, len(symbols), self.chunk_size):
+            chunk = symbols[i:i + self.chunk_size]
+            kwargs = {'start': start} if start is not None else {'period': period}
+            data = yf.download(chunk, group_by='ticker', ignore_tz=False,
+                               progress=False, threads=True, session=self.session,
+                               **kwargs)
+            for symbol in chunk:
+                if data is None or symbol not in data.columns.get_level_values(0):
+                    frames[symbol] = pd.DataFrame(columns=OHLCV_COLUMNS)
+                    continue
+                frames[symbol] = data[symbol].dropna(how='all')
+        return frames
+    
+    def company_name(self, symbol):
+        import yfinance as yf
+        return yf.Ticker(symbol, session=self.session).info.get('longName', symbol)
+
+
+class SyntheticProvider(DataProvider):
+    # Deterministic offline OHLCV data: the same symbol always produces the same
+    # random walk, so benchmarks and offline runs are repeatable.
+    def __init__(self, years=20, end=None, seed=0, latency=0.0):
+        self.bars = int(years * 252)
+        self.end = pd.Timestamp(end or pd.Timestamp.now().normalize(),
+                                tz='America/New_York')
+        self.seed = seed
+        self.latency = latency
+    
+    def frame(self, symbol, bars=None):
+        bars = bars or self.bars
+        rng = np.random.default_rng([self.seed, zlib.crc32(symbol.upper().encode())])
+        index = pd.bdate_range(end=self.end.normalize(), periods=bars,
+                               tz=self.end.tz, name='Date')
+        close = 20 + 180 * rng.random() * np.exp(
+            np.cumsum(rng.normal(0.0003, 0.015, bars)))
+        open_ = close * (1 + rng.normal(0, 0.004, bars))
+        spread = np.abs(rng.normal(0, 0.01, bars)) * close
+        return pd.DataFrame({
+            'Open': open_,
+            'High': np.maximum(open_, close) + spread,
+            'Low': np.minimum(open_, close) - spread,
+            'Close': close,
+            'Volume': rng.lognormal(15, 0.5, bars).astype(np.int64),
+        }, index=index)
+    
+    def history(self, symbol, period=None, start=None):
+        if self.latency:
+            time.sleep(self.latency)
+        df = self.frame(symbol)
+        if start is not None:
+            return df[df.index >= pd.Timestamp(start, tz=df.index.tz)]
+        return df[df.index >= self.end.normalize() - PERIOD_OFFSETS[period]]
+    
+    def company_name(self, symbol):
+        return f"{symbol.upper()} Synthetic Inc."
+
+
+class HistoryCache:
+    def __init__(self, provider=None, cache_dir=None, ttl=15 * 60,
+                 fetch_period='5y', storage=None):
+        self.provider = provider or YahooProvider()
+        self.cache_dir = os.path.join(cache_dir or DEFAULT_CACHE_DIR, 'history')
+        self.store = None
+        if (storage or os.environ.get(STORAGE_ENV)) == 'columnar':
+            self.store = ColumnarStore(cache_dir or DEFAULT_CACHE_DIR)
+        self.ttl = ttl
+        self.fetch_period = fetch_period
+        self.ext = '.parquet' if HAS_PARQUET else '.pkl'
+        self._lock = threading.Lock()
+        self._symbol_locks = {}
+        self._index_path = os.path.join(self.cache_dir, 'index.json')
+        self._index = None
+    
+    def get(self, symbol, period):
+        symbol = symbol.upper()
+        with self._symbol_lock(symbol):
+            df = self._refresh(symbol, period)
+        return self.slice(df, period)
+    
+    def get_many(self, symbols, period):
+        symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+        # Holds every symbol's lock, in a fixed order, so get() calls from
+        # other threads don't read or write the same files meanwhile.
+        with ExitStack() as stack:
+            for symbol in sorted(symbols):
+                stack.enter_context(self._symbol_lock(symbol))
+            return self._get_many(symbols, period)
+    
+    def _get_many(self, symbols, period):
+        frames = {}
+        missing = []
+        stale = []
+        
+        for symbol in symbols:
+            entry = self._load_entry(symbol)
+            df = self._read(symbol) if entry else None
+            if df is None or df.empty or period_rank(period) > period_rank(entry['period']):
+                missing.append(symbol)
+                continue
+            frames[symbol] = df
+            if time.time() - entry['fetched'] > self.ttl:
+                stale.append(symbol)
+        
+        if missing:
+            fetch_period = max(period, self.fetch_period, key=period_rank)
+            fetched = self.provider.history_many(missing, period=fetch_period)
+            for symbol in missing:
+                df = normalize_history(fetched.get(symbol, pd.DataFrame()))
+                if not df.empty:
+                    df = self._write(symbol, df, fetch_period, save_index=False)
+                frames[symbol] = df
+        
+        if stale:
+            start = min(delta_start(frames[symbol]) for symbol in stale)
+            try:
+                deltas = self.provider.history_many(stale, start=start.strftime('%Y-%m-%d'))
+            except Exception:
+                # The cached history is served as it is; `fetched` is left
+                # alone, so the next call tries again.
+                deltas, stale = {}, []
+            adjusted = []
+            for symbol in stale:
+                if readjusted(frames[symbol], deltas.get(symbol)):
+                    adjusted.append(symbol)
+                    continue
+                df = self._merge(frames[symbol], deltas.get(symbol))
+                frames[symbol] = self._write(symbol, df, self._load_entry(symbol)['period'],
+                                             save_index=False)
+            
+            if adjusted:
+                fetch_period = max((self._load_entry(symbol)['period'] for symbol in adjusted),
+                                   key=period_rank)
+                try:
+                    fetched = self.provider.history_many(adjusted, period=fetch_period)
+                except Exception:
+                    fetched = {}
+                for symbol in adjusted:
+                    df = normalize_history(fetched.get(symbol, pd.DataFrame()))
+                    if not df.empty:
+                        frames[symbol] = self._write(symbol, df, fetch_period,
+                                                     save_index=False)
+        
+        if missing or stale:
+            with self._lock:
+                self._save_index()
+        return {symbol: self.slice(frames[symbol], period) for symbol in symbols}
+    
+    def slice(self, df, period):
+        if df.empty:
+            return df
+        # A positional slice, so frames backed by the columnar store stay views.
+        return df.iloc[df.index.searchsorted(period_start(period, df.index.tz)):]
+    
+    def invalidate(self, symbol):
+        symbol = symbol.upper()
+        with self._symbol_lock(symbol):
+            path = self._path(symbol)
+            if os.path.exists(path):
+                os.remove(path)
+            if self.store is not None:
+                self.store.remove(symbol)
+            with self._lock:
+                self._load_index().pop(symbol, None)
+                self._save_index()
+    
+    def _refresh(self, symbol, period):
+        entry = self._load_entry(symbol)
+        df = self._read(symbol) if entry else None
+        
+        if df is None or df.empty or period_rank(period) > period_rank(entry['period']):
+            fetch_period = max(period, self.fetch_period, key=period_rank)
+            df = normalize_history(self.provider.history(symbol, period=fetch_period))
+            if not df.empty:
+                df = self._write(symbol, df, fetch_period)
+            return df
+        
+        if time.time() - entry['fetched'] > self.ttl:
+            start = delta_start(df)
+            full = None
+            try:
+                delta = self.provider.history(symbol, start=start.strftime('%Y-%m-%d'))
+                if readjusted(df, delta):
+                    full = normalize_history(self.provider.history(symbol, period=entry['period']))
+            except Exception:
+                # Serve the cached history; `fetched` is left alone, so the
+                # next call tries again.
+                return df
+            if full is not None:
+                return self._write(symbol, full, entry['period']) if not full.empty else df
+            df = self._write(symbol, self._merge(df, delta), entry['period'])
+        return df
+    
+    def _merge(self, df, delta):
+        if delta is None or delta.empty:
+            return df
+        df = pd.concat([df, normalize_history(delta)])
+        return df[~df.index.duplicated(keep='last')].sort_index()
+    
+    def _symbol_lock(self, symbol):
+        with self._lock:
+            return self._symbol_locks.setdefault(symbol, threading.Lock())
+    
+    def _path(self, symbol):
+        return os.path.join(self.cache_dir, safe_symbol(symbol) + self.ext)
+    
+    def _read(self, symbol):
+        if self.store is not None:
+            return self.store.frame(symbol)
+        path = self._path(symbol)
+        if not os.path.exists(path):
+            return None
+        try:
+            if HAS_PARQUET:
+                return normalize_history(pd.read_parquet(path))
+            return normalize_history(pd.read_pickle(path))
+        except Exception:
+            return None
+    
+    def _write(self, symbol, df, period, save_index=True):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        if self.store is not None:
+            self.store.put(symbol, df)
+        else:
+            path = self._path(symbol)
+            tmp_path = path + '.tmp'
+            if HAS_PARQUET:
+                df.to_parquet(tmp_path)
+            else:
+                df.to_pickle(tmp_path)
+            os.replace(tmp_path, path)
+        with self._lock:
+            self._load_index()[symbol] = {'period': period, 'fetched': time.time()}
+            if save_index:
+                self._save_index()
+        # With the columnar store, callers get the stored (mapped, read-only)
+        # frame back.
+        return df if self.store is None else self.store.frame(symbol)
+    
+    def _load_entry(self, symbol):
+        with self._lock:
+            return self._load_index().get(symbol)
+    
+    def _load_index(self):
+        if self._index is None:
+            try:
+                with open(self._index_path) as f:
+                    self._index = json.load(f)
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+    
+    def _save_index(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self._index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self._index_path)
+
+
+class MetadataStore:
+    def __init__(self, provider=None, cache_dir=None, ttl=7 * 24 * 3600):
+        self.provider = provider or YahooProvider()
+        self.path = os.path.join(cache_dir or DEFAULT_CACHE_DIR, 'metadata.json')
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = None
+        self._pending = set()
+        self._executor = ThreadPoolExecutor(max_workers=2,
+                                            thread_name_prefix='metadata')
+    
+    def get_name(self, symbol, on_update=None, refresh=True):
+        symbol = symbol.upper()
+        with self._lock:
+            entry = self._load().get(symbol)
+            stale = self._stale(entry, time.time())
+            if refresh and stale and symbol not in self._pending:
+                self._pending.add(symbol)
+                self._executor.submit(self._refresh, symbol, on_update)
+        return entry['name'] if entry else symbol
+    
+    def get_names(self, symbols, workers=8):
+        # Names for a batch, as futures. Cached names are resolved already;
+        # missing or stale ones are looked up over `workers` threads in the
+        # background, so callers can start on the batch and wait per symbol.
+        # A failed lookup keeps the old name (or the ticker) for
+        # FAILED_NAME_TTL, so dead symbols aren't retried on every run.
+        symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+        futures = {}
+        fetch = []
+        with self._lock:
+            entries = self._load()
+            now = time.time()
+            for symbol in symbols:
+                entry = entries.get(symbol)
+                if self._stale(entry, now):
+                    fetch.append(symbol)
+                else:
+                    futures[symbol] = Future()
+                    futures[symbol].set_result(entry['name'])
+        
+        if fetch:
+            pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='metadata')
+            remaining = [len(fetch)]
+            for symbol in fetch:
+                futures[symbol] = pool.submit(self._lookup, symbol, remaining)
+            pool.shutdown(wait=False)
+        return futures
+    
+    def _lookup(self, symbol, remaining):
+        try:
+            name = self.provider.company_name(symbol) or symbol
+        except Exception:
+            name = None
+        with self._lock:
+            entries = self._load()
+            if name is None:
+                name = entries.get(symbol, {}).get('name', symbol)
+                entries[symbol] = {'name': name, 'fetched': time.time(), 'failed': True}
+            else:
+                entries[symbol] = {'name': name, 'fetched': time.time()}
+            # Saved once, after the batch's last lookup.
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                self._save()
+        return name
+    
+    def _stale(self, entry, now):
+        if entry is None:
+            return True
+        ttl = FAILED_NAME_TTL if entry.get('failed') else self.ttl
+        return now - entry['fetched'] > ttl
+    
+    def _refresh(self, symbol, on_update):
+        try:
+            name = self.provider.company_name(symbol) or symbol
+        except Exception:
+            return
+        finally:
+            with self._lock:
+                self._pending.discard(symbol)
+        
+        with self._lock:
+            entries = self._load()
+            previous = entries.get(symbol, {}).get('name')
+            entries[symbol] = {'name': name, 'fetched': time.time()}
+            self._save()
+        
+        if on_update is not None and name != previous:
+            on_update(symbol, name)
+    
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self.path) as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+    
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,201 @@
+import argparse
+import bisect
+import csv
+import os
+import re
+import sys
+import time
+
+from stock_data import DEFAULT_CACHE_DIR, shared_session
+
+# Nasdaq Trader's daily symbol files cover everything listed on US exchanges.
+DIRECTORY_URLS = [
+    'https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqlisted.txt',
+    'https://www.nasdaqtrader.com/dynamic/SymDir/otherlisted.txt',
+]
+DIRECTORY_MAX_AGE = 7 * 24 * 3600
+
+SYMBOL_PATTERN = re.compile(r'^[A-Z0-9^][A-Z0-9.^=-]{0,14}$')
+# Indices (^GSPC), currencies and futures (EURUSD=X, CL=F), crypto pairs
+# (BTC-USD) and foreign listings (SHOP.TO) are Yahoo symbols the US
+# directory doesn't list. Share classes (BRK-B) have shorter suffixes.
+UNLISTED_PATTERN = re.compile(r'[\^=]|\.[A-Z]{1,3}$|-[A-Z]{3}$')
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def directory_path(cache_dir=None):
+    return os.path.join(cache_dir or DEFAULT_CACHE_DIR, 'symbols.csv')
+
+
+def load_directory(cache_dir=None):
+    try:
+        with open(directory_path(cache_dir), newline='', encoding='utf-8') as f:
+            return [(row['symbol'], row['name']) for row in csv.DictReader(f)]
+    except (OSError, KeyError, csv.Error):
+        return None
+
+
+def save_directory(entries, cache_dir=None):
+    path = directory_path(cache_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['symbol', 'name'])
+        writer.writerows(entries)
+    os.replace(tmp_path, path)
+
+
+def yahoo_symbol(symbol):
+    # Nasdaq Trader writes share classes as BRK.B and preferreds as ABR$D;
+    # Yahoo uses BRK-B and ABR-PD.
+    return symbol.replace('.', '-').replace('$', '-P')
+
+
+def parse_directory(text):
+    lines = text.splitlines()
+    if not lines:
+        return []
+    header = lines[0].split('|')
+    symbol_column = 'Symbol' if 'Symbol' in header else 'ACT Symbol'
+    entries = []
+    for line in lines[1:]:
+        if line.startswith('File Creation Time'):
+            continue
+        row = dict(zip(header, line.split('|')))
+        if row.get('Test Issue') == 'Y' or not row.get(symbol_column):
+            continue
+        entries.append((yahoo_symbol(row[symbol_column]), row.get('Security Name', '')))
+    return entries
+
+
+def download_directory(session=None, timeout=30):
+    session = session or shared_session()
+    entries = {}
+    for url in DIRECTORY_URLS:
+        response = session.get(url, timeout=timeout)
+        response.raise_for_status()
+        entries.update(parse_directory(response.text))
+    return sorted(entries.items())
+
+
+def directory_age(cache_dir=None):
+    try:
+        return time.time() - os.path.getmtime(directory_path(cache_dir))
+    except OSError:
+        return None
+
+
+def load_index(cache_dir=None, refresh=True):
+    # Downloads the directory when it is missing or older than a week. If that
+    # fails the old file is used, or an empty index that accepts any symbol.
+    entries = load_directory(cache_dir)
+    age = directory_age(cache_dir)
+    if refresh and (entries is None or age is None or age > DIRECTORY_MAX_AGE):
+        try:
+            entries = download_directory()
+            save_directory(entries, cache_dir)
+        except Exception:
+            pass
+    return SymbolIndex(entries or [])
+
+
+class SymbolIndex:
+    # Symbols are kept sorted for prefix lookups with bisect. Names are split
+    # into words, sorted the same way, so a name search is a bisect on one
+    # query word followed by a substring check of the few names it hits.
+    def __init__(self, entries):
+        entries = sorted(dict(entries).items())
+        self.symbols = [symbol for symbol, _ in entries]
+        self.names = [name for _, name in entries]
+        self._lower = [name.lower() for name in self.names]
+        words = sorted((word, row) for row, name in enumerate(self._lower)
+                       for word in set(WORD_PATTERN.findall(name)))
+        self._words = [word for word, _ in words]
+        self._word_rows = [row for _, row in words]
+    
+    def __len__(self):
+        return len(self.symbols)
+    
+    def __contains__(self, symbol):
+        i = bisect.bisect_left(self.symbols, symbol)
+        return i < len(self.symbols) and self.symbols[i] == symbol
+    
+    def prefix_rows(self, prefix, limit):
+        rows = []
+        i = bisect.bisect_left(self.symbols, prefix)
+        while i < len(self.symbols) and len(rows) < limit and self.symbols[i].startswith(prefix):
+            rows.append(i)
+            i += 1
+        return rows
+    
+    def name_rows(self, text, limit):
+        # Names containing `text` starting at a word boundary. Candidates come
+        # from the query word that starts the fewest name words.
+        spans = []
+        for word in WORD_PATTERN.findall(text):
+            # '{' sorts right after 'z', so this spans every word with the prefix.
+            spans.append((bisect.bisect_left(self._words, word),
+                          bisect.bisect_left(self._words, word + '{')))
+        if not spans:
+            return []
+        start, stop = min(spans, key=lambda span: span[1] - span[0])
+        boundary = re.compile(r'(?<![a-z0-9])' + re.escape(text))
+        rows = []
+        for i in range(start, stop):
+            row = self._word_rows[i]
+            if boundary.search(self._lower[row]) and row not in rows:
+                rows.append(row)
+                if len(rows) == limit:
+                    break
+        return rows
+    
+    def search(self, query, limit=8):
+        # Symbol prefix matches first (an exact symbol sorts first among them),
+        # then listings with a name word starting with the query.
+        query = query.strip()
+        if not query or '\n' in query:
+            return []
+        rows = self.prefix_rows(query.upper(), limit)
+        if len(rows) < limit:
+            seen = set(rows)
+            rows += [row for row in self.name_rows(query.lower(), limit)
+                     if row not in seen][:limit - len(rows)]
+        return [(self.symbols[row], self.names[row]) for row in rows]
+    
+    def check(self, symbol):
+        # Returns why `symbol` can't be fetched, or None if it may be.
+        if not SYMBOL_PATTERN.match(symbol):
+            return f"'{symbol}' is not a valid ticker symbol"
+        if not self.symbols or symbol in self or UNLISTED_PATTERN.search(symbol):
+            return None
+        matches = self.search(symbol, 3)
+        hint = f" Did you mean {', '.join(s for s, _ in matches)}?" if matches else ""
+        return f"Unknown symbol '{symbol}'.{hint}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search the local symbol directory")
+    parser.add_argument('query', nargs='*', help="symbol prefix or part of a company name")
+    parser.add_argument('--update', action='store_true',
+                        help="download the directory from Nasdaq Trader first")
+    parser.add_argument('-n', '--limit', type=int, default=10)
+    args = parser.parse_args(argv)
+    
+    if args.update:
+        try:
+            entries = download_directory()
+        except Exception as e:
+            print(f"Could not download the symbol directory: {e}", file=sys.stderr)
+            return 1
+        save_directory(entries)
+        print(f"Saved {len(entries)} symbols to {directory_path()}")
+    index = load_index(refresh=False)
+    for query in args.query:
+        for symbol, name in index.search(query, args.limit):
+            print(f"{symbol:<10} {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,22 @@
+# Colours shared by the GUI, the chart and headless reports. Kept free of
+# heavy imports so the window can use it before first paint.
+COLORS = {
+    'bg_gradient_top': '#667eea',
+    'bg_gradient_bottom': '#764ba2',
+    'bg_main': '#1a1a2e',
+    'bg_secondary': '#16213e',
+    'accent_primary': '#f64c72',
+    'accent_secondary': '#4facfe',
+    'success': '#00f2fe',
+    'warning': '#ffd93d',
+    'text_primary': '#ffffff',
+    'text_secondary': '#a8b2d1',
+    'card_bg': '#0f3460',
+    'button_gradient_1': '#f093fb',
+    'button_gradient_2': '#f5576c',
+}
+
+UP_COLOR = '#00f2a0'
+DOWN_COLOR = '#ff6b6b'
+PRED_UP_COLOR = '#4ecdc4'
+PRED_DOWN_COLOR = '#ff6b9d'
@@ -0,0 +1,114 @@
+import numpy as np
+
+
+def fit_trends(closes):
+    # Least squares fit of y = intercept + slope * x for every row, where x is
+    # 0..n-1 over the row's non-NaN values. Because x is a plain day index its
+    # sums have closed forms, so only the y terms need to be accumulated.
+    y = np.atleast_2d(np.asarray(closes, dtype=float))
+    valid = ~np.isnan(y)
+    n = valid.sum(axis=1).astype(float)
+    x = np.cumsum(valid, axis=1) - 1.0
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        x_mean = (n - 1) / 2
+        y_mean = np.where(valid, y, 0.0).sum(axis=1) / n
+        dx = np.where(valid, x - x_mean[:, None], 0.0)
+        dy = np.where(valid, y - y_mean[:, None], 0.0)
+        
+        sxx = n * (n * n - 1) / 12
+        sxy = (dx * dy).sum(axis=1)
+        syy = (dy * dy).sum(axis=1)
+        
+        slope = np.where(sxx > 0, sxy / sxx, 0.0)
+        intercept = y_mean - slope * x_mean
+        r2 = np.where(syy > 0, sxy * sxy / (sxx * syy), 1.0)
+        r2 = np.where((sxx > 0) | (syy == 0), r2, 0.0)
+    
+    return slope, intercept, r2, n
+
+
+def forecast_trends(slope, intercept, n, days):
+    future = n[:, None] + np.arange(days)
+    return intercept[:, None] + slope[:, None] * future
+
+
+def stack_series(series):
+    width = max((len(s) for s in series), default=0)
+    closes = np.full((len(series), width), np.nan)
+    for i, s in enumerate(series):
+        closes[i, :len(s)] = s
+    return closes
+
+
+def window_sums(values, window):
+    sums = np.cumsum(values, axis=1)
+    sums = np.concatenate([np.zeros((values.shape[0], 1)), sums], axis=1)
+    return sums[:, window:] - sums[:, :-window]
+
+
+def rolling_trends(closes, window):
+    # Trend fits over every trailing window of `window` bars, computed from
+    # cumulative sums so all windows come out of a single pass. Column j is the
+    # fit over bars j..j+window-1 in that window's own 0..window-1 day index.
+    y = np.atleast_2d(np.asarray(closes, dtype=float))
+    rows, length = y.shape
+    if length < window:
+        empty = np.empty((rows, 0))
+        return empty, empty
+    
+    valid = ~np.isnan(y)
+    with np.errstate(invalid='ignore'):
+        base = np.where(valid.any(axis=1),
+                        np.nansum(y, axis=1) / np.maximum(valid.sum(axis=1), 1), 0.0)
+    y0 = np.where(valid, y - base[:, None], 0.0)
+    t = np.arange(length, dtype=float)
+    
+    count = window_sums(valid.astype(float), window)
+    sy = window_sums(y0, window)
+    sty = window_sums(y0 * t, window)
+    
+    start = t[:length - window + 1]
+    x_mean = (window - 1) / 2
+    sxx = window * (window * window - 1) / 12
+    
+    slope = (sty - start * sy - x_mean * sy) / sxx if window > 1 else np.zeros_like(sy)
+    intercept = sy / window - slope * x_mean + base[:, None]
+    
+    full = count == window
+    return np.where(full, slope, np.nan), np.where(full, intercept, np.nan)
+
+
+def walk_forward_backtest(closes, window, horizon):
+    y = np.atleast_2d(np.asarray(closes, dtype=float))
+    rows, length = y.shape
+    slope, intercept = rolling_trends(y, window)
+    ends = np.arange(slope.shape[1]) + window - 1
+    
+    metrics = {name: np.full((rows, horizon), np.nan)
+               for name in ('mae', 'mape', 'hit_rate')}
+    metrics['samples'] = np.zeros((rows, horizon), dtype=int)
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for h in range(1, horizon + 1):
+            usable = ends + h < length
+            if not usable.any():
+                break
+            targets = ends[usable] + h
+            pred = intercept[:, usable] + slope[:, usable] * (window - 1 + h)
+            actual = y[:, targets]
+            last = y[:, ends[usable]]
+            
+            ok = ~np.isnan(pred) & ~np.isnan(actual) & ~np.isnan(last)
+            samples = ok.sum(axis=1)
+            error = np.where(ok, np.abs(pred - actual), 0.0)
+            pct_ok = ok & (actual != 0)
+            pct_error = np.where(pct_ok, error / np.abs(actual), 0.0)
+            hits = ok & (np.sign(pred - last) == np.sign(actual - last))
+            
+            metrics['mae'][:, h - 1] = error.sum(axis=1) / samples
+            metrics['mape'][:, h - 1] = pct_error.sum(axis=1) / pct_ok.sum(axis=1) * 100
+            metrics['hit_rate'][:, h - 1] = hits.sum(axis=1) / samples
+            metrics['samples'][:, h - 1] = samples
+    
+    return metrics
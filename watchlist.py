@@ -0,0 +1,165 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from stock_data import DEFAULT_CACHE_DIR
+
+DEFAULT_WATCHLIST = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'NVDA', 'META', 'TSLA']
+
+
+def watchlist_path(cache_dir=None):
+    return os.path.join(cache_dir or DEFAULT_CACHE_DIR, 'watchlist.json')
+
+
+def load_watchlist(cache_dir=None):
+    try:
+        with open(watchlist_path(cache_dir)) as f:
+            return [symbol.upper() for symbol in json.load(f)]
+    except (OSError, ValueError):
+        return list(DEFAULT_WATCHLIST)
+
+
+def save_watchlist(symbols, cache_dir=None):
+    path = watchlist_path(cache_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(list(symbols), f)
+    os.replace(tmp_path, path)
+
+
+class TokenBucket:
+    # Allows bursts of up to `capacity` requests, then `rate` requests per second.
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+        self._lock = threading.Lock()
+    
+    def acquire(self, tokens=1):
+        while True:
+            with self._lock:
+                now = self.clock()
+                self.tokens = min(self.capacity,
+                                  self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class RefreshScheduler:
+    # Keeps every symbol refreshed at most `stale_after` seconds apart. A single
+    # dispatcher thread picks the next due symbol (visible rows first, then the
+    # stalest), waits for a rate limit token and a free worker, and hands the
+    # symbol to a bounded pool. Results go to `on_result(symbol, record)` from
+    # the worker thread.
+    def __init__(self, refresh, on_result, workers=8, rate=2.0, burst=5,
+                 stale_after=15 * 60):
+        self.refresh = refresh
+        self.on_result = on_result
+        self.stale_after = stale_after
+        self.bucket = TokenBucket(rate, burst)
+        self.symbols = []
+        self.visible = set()
+        self.refreshed = {}
+        self.in_flight = set()
+        self._invalidated = set()
+        self._slots = threading.Semaphore(workers)
+        self._pool = ThreadPoolExecutor(max_workers=workers,
+                                        thread_name_prefix='watchlist')
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._dispatch, name='watchlist-scheduler',
+                                        daemon=True)
+    
+    def start(self):
+        self._thread.start()
+    
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+    
+    def set_symbols(self, symbols):
+        with self._cond:
+            self.symbols = list(dict.fromkeys(symbols))
+            keep = set(self.symbols)
+            self.refreshed = {s: t for s, t in self.refreshed.items() if s in keep}
+            self._cond.notify()
+    
+    def set_visible(self, symbols):
+        with self._cond:
+            self.visible = set(symbols)
+            self._cond.notify()
+    
+    def invalidate(self, symbols=None):
+        with self._cond:
+            symbols = self.symbols if symbols is None else symbols
+            for symbol in symbols:
+                self.refreshed.pop(symbol, None)
+            # A refresh already running used the old inputs; run it again.
+            self._invalidated.update(self.in_flight.intersection(symbols))
+            self._cond.notify()
+    
+    def _next_due(self):
+        # Returns (symbol, None) when something is due, else (None, seconds to wait).
+        now = time.monotonic()
+        best = None
+        wait = None
+        for symbol in self.symbols:
+            if symbol in self.in_flight:
+                continue
+            refreshed = self.refreshed.get(symbol)
+            if refreshed is not None and now - refreshed < self.stale_after:
+                remaining = self.stale_after - (now - refreshed)
+                wait = remaining if wait is None else min(wait, remaining)
+                continue
+            key = (symbol not in self.visible, refreshed or 0.0)
+            if best is None or key < best[0]:
+                best = (key, symbol)
+        if best is not None:
+            return best[1], None
+        return None, wait
+    
+    def _dispatch(self):
+        while True:
+            self._slots.acquire()
+            with self._cond:
+                while True:
+                    if self._stopped:
+                        return
+                    symbol, wait = self._next_due()
+                    if symbol is not None:
+                        break
+                    self._cond.wait(wait)
+                self.in_flight.add(symbol)
+            
+            self.bucket.acquire()
+            try:
+                self._pool.submit(self._run, symbol)
+            except RuntimeError:
+                return
+    
+    def _run(self, symbol):
+        try:
+            record = self.refresh(symbol)
+        except Exception as e:
+            record = {'symbol': symbol, 'error': str(e)}
+        finally:
+            with self._cond:
+                self.in_flight.discard(symbol)
+                if symbol in self._invalidated:
+                    self._invalidated.discard(symbol)
+                else:
+                    self.refreshed[symbol] = time.monotonic()
+                self._cond.notify()
+            self._slots.release()
+        self.on_result(symbol, record)
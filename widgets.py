@@ -0,0 +1,206 @@
+import tkinter as tk
+from tkinter import ttk
+
+
+class VirtualTable:
+    # A Treeview with a fixed pool of `height` row items. Scrolling moves a data
+    # offset and rewrites the pooled items, so the number of Tk items stays the
+    # same however many rows the table holds.
+    def __init__(self, parent, columns, height=12, style=None, format_row=None,
+                 on_scroll=None, on_activate=None):
+        self.columns = columns
+        self.height = height
+        self.format_row = format_row or (lambda key, record: [key])
+        self.on_scroll = on_scroll
+        self.on_activate = on_activate
+        self.keys = []
+        self._key_set = set()
+        self.records = {}
+        self.offset = 0
+        
+        self.frame = tk.Frame(parent)
+        options = {'style': style} if style else {}
+        self.tree = ttk.Treeview(self.frame, columns=[c for c, _ in columns],
+                                 show='headings', height=height, selectmode='browse',
+                                 **options)
+        for column, width in columns:
+            self.tree.heading(column, text=column)
+            self.tree.column(column, width=width, anchor='center')
+        self.items = [self.tree.insert('', tk.END, values=()) for _ in range(height)]
+        
+        self.scrollbar = tk.Scrollbar(self.frame, orient=tk.VERTICAL,
+                                      command=self._on_scrollbar)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        self.tree.bind('<MouseWheel>', self._on_mousewheel)
+        self.tree.bind('<Button-4>', lambda e: self._scroll_by(-1))
+        self.tree.bind('<Button-5>', lambda e: self._scroll_by(1))
+        self.tree.bind('<Double-1>', self._on_double_click)
+        self.tree.bind('<Return>', self._on_double_click)
+    
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+    
+    def set_keys(self, keys):
+        self.keys = list(keys)
+        self._key_set = set(self.keys)
+        self.records = {key: self.records[key] for key in self.keys if key in self.records}
+        self._move_to(self.offset)
+    
+    def update_record(self, key, record):
+        if key not in self._key_set:
+            return
+        self.records[key] = record
+        try:
+            row = self.keys.index(key, self.offset, self.offset + self.height)
+        except ValueError:
+            return
+        self._render_row(row - self.offset)
+    
+    def visible_keys(self):
+        return self.keys[self.offset:self.offset + self.height]
+    
+    def selected_key(self):
+        selection = self.tree.selection()
+        if not selection:
+            return None
+        row = self.offset + self.items.index(selection[0])
+        return self.keys[row] if row < len(self.keys) else None
+    
+    def _render_row(self, i):
+        row = self.offset + i
+        if row < len(self.keys):
+            key = self.keys[row]
+            values, tags = self.format_row(key, self.records.get(key))
+        else:
+            values, tags = (), ()
+        item = self.items[i]
+        if self.tree.item(item, 'values') != tuple(str(v) for v in values):
+            self.tree.item(item, values=values, tags=tags)
+    
+    def _move_to(self, offset):
+        offset = max(0, min(offset, len(self.keys) - self.height))
+        moved = offset != self.offset
+        self.offset = offset
+        for i in range(self.height):
+            self._render_row(i)
+        if self.keys:
+            self.scrollbar.set(offset / len(self.keys),
+                               min(1.0, (offset + self.height) / len(self.keys)))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        if moved:
+            self.tree.selection_remove(self.tree.selection())
+        if self.on_scroll is not None:
+            self.on_scroll(self.visible_keys())
+    
+    def _scroll_by(self, rows):
+        self._move_to(self.offset + rows)
+        return 'break'
+    
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == 'moveto':
+            self._move_to(round(float(amount) * len(self.keys)))
+        elif unit == 'pages':
+            self._move_to(self.offset + int(amount) * self.height)
+        else:
+            self._move_to(self.offset + int(amount))
+    
+    def _on_mousewheel(self, event):
+        return self._scroll_by(-3 if event.delta > 0 else 3)
+    
+    def _on_double_click(self, event):
+        key = self.selected_key()
+        if key is not None and self.on_activate is not None:
+            self.on_activate(key)
+
+
+class Autocomplete:
+    # A suggestion list under an Entry. `search(text)` returns (value, label)
+    # pairs; picking one puts its value into the entry and calls `on_pick`.
+    IGNORED_KEYS = {'Up', 'Down', 'Return', 'KP_Enter', 'Escape', 'Tab'}
+    
+    def __init__(self, entry, search, max_rows=8, on_pick=None, **listbox_options):
+        self.entry = entry
+        self.search = search
+        self.max_rows = max_rows
+        self.on_pick = on_pick
+        self.values = []
+        
+        self.popup = tk.Toplevel(entry)
+        self.popup.withdraw()
+        self.popup.overrideredirect(True)
+        self.listbox = tk.Listbox(self.popup, height=max_rows, activestyle='none',
+                                  exportselection=False, takefocus=0, **listbox_options)
+        self.listbox.pack(fill=tk.BOTH, expand=True)
+        self.listbox.bind('<Button-1>', self._on_click)
+        
+        entry.bind('<KeyRelease>', self._on_key, add='+')
+        entry.bind('<Down>', lambda e: self._move(1))
+        entry.bind('<Up>', lambda e: self._move(-1))
+        entry.bind('<Return>', self._on_return)
+        entry.bind('<Escape>', lambda e: self.hide())
+        # Let a click on the list land before the entry's focus loss hides it.
+        entry.bind('<FocusOut>', lambda e: entry.after(150, self.hide), add='+')
+    
+    def visible(self):
+        return self.popup.winfo_ismapped()
+    
+    def hide(self):
+        self.popup.withdraw()
+    
+    def refresh(self):
+        text = self.entry.get()
+        matches = self.search(text) if text.strip() else []
+        self.values = [value for value, _ in matches]
+        if not matches:
+            self.hide()
+            return
+        self.listbox.delete(0, tk.END)
+        for value, label in matches:
+            self.listbox.insert(tk.END, f"{value}  {label}")
+        self.listbox.config(height=min(len(matches), self.max_rows))
+        x = self.entry.winfo_rootx()
+        y = self.entry.winfo_rooty() + self.entry.winfo_height()
+        self.popup.geometry(f"+{x}+{y}")
+        self.popup.deiconify()
+        self.popup.lift()
+    
+    def pick(self, row):
+        value = self.values[row]
+        self.entry.delete(0, tk.END)
+        self.entry.insert(0, value)
+        self.hide()
+        if self.on_pick is not None:
+            self.on_pick(value)
+    
+    def _on_key(self, event):
+        if event.keysym not in self.IGNORED_KEYS:
+            self.refresh()
+    
+    def _move(self, step):
+        if not self.visible():
+            self.refresh()
+            return 'break'
+        selection = self.listbox.curselection()
+        row = selection[0] + step if selection else (0 if step > 0 else len(self.values) - 1)
+        row = max(0, min(row, len(self.values) - 1))
+        self.listbox.selection_clear(0, tk.END)
+        self.listbox.selection_set(row)
+        self.listbox.see(row)
+        return 'break'
+    
+    def _on_return(self, event):
+        selection = self.listbox.curselection()
+        if self.visible() and selection:
+            self.pick(selection[0])
+            return 'break'
+        self.hide()
+    
+    def _on_click(self, event):
+        row = self.listbox.nearest(event.y)
+        if 0 <= row < len(self.values):
+            self.pick(row)
+        # Skip the Listbox class binding, so the entry keeps the focus.
+        return 'break'